@@ -0,0 +1,125 @@
+import os
+import json
+import pygame
+from os.path import join, exists, relpath
+from settings import *
+
+# Folders of numbered animation frames and single images packed into the atlas [relative to ASSETS_DIR]
+ATLAS_FOLDERS = [
+    'images/player/up', 'images/player/down', 'images/player/left', 'images/player/right',
+    'images/enemies/bat', 'images/enemies/blob', 'images/enemies/skeleton',
+    'images/enemies/boss/move', 'images/enemies/boss/attack', 'images/enemies/boss/teleport', 'images/enemies/boss/summon',
+]
+ATLAS_IMAGES = ['images/gun/gun.png', 'images/gun/bullet.png', 'data/graphics/objects/green_tree.png']
+ATLAS_PADDING = 1 # Empty pixels between packed images
+
+def asset_key(path): # Path relative to the assets folder, with forward slashes on every platform
+    return relpath(path, ASSETS_DIR).replace(os.sep, '/')
+
+def list_frames(path): # Function to list the numbered .png files of a folder in frame order
+    image_files = [filename for filename in os.listdir(path) if filename.endswith('.png')] # Filter only .png files
+    image_files.sort(key=lambda filename: int(filename.split('.')[0])) # Sorting by the number in the filename
+    return image_files
+
+def source_files(): # Every image file the atlas is packed from, in packing order
+    paths = []
+    for folder in ATLAS_FOLDERS:
+        path = join(ASSETS_DIR, folder)
+        if exists(path):
+            paths += [join(path, filename) for filename in list_frames(path)]
+    return paths + [join(ASSETS_DIR, image) for image in ATLAS_IMAGES if exists(join(ASSETS_DIR, image))]
+
+def source_stamp(): # Key, size and mtime of every source file [any edited, added or removed image changes it]
+    stats = [(path, os.stat(path)) for path in source_files()]
+    return [[asset_key(path), stat.st_size, stat.st_mtime_ns] for path, stat in stats]
+
+class Atlas: # Packed images loaded from a few files instead of one file per frame
+    entries = None # Dictionary mapping an asset key to a subsurface [folders map to a list of subsurfaces]
+
+    @classmethod
+    def load(cls): # Loading the atlas pages once per process [empty if the atlas was never built]
+        if cls.entries is not None:
+            return cls.entries
+        cls.entries = {}
+        if not exists(ATLAS_INDEX):
+            return cls.entries
+        with open(ATLAS_INDEX) as file:
+            index = json.load(file)
+        if index.get('sources') != source_stamp(): # Images changed since the atlas was built, loading them one by one instead
+            print("WARNING: " + ATLAS_INDEX + " is out of date, rebuild it with: python atlas.py")
+            return cls.entries
+        pages = [pygame.image.load(join(ATLAS_DIR, name)).convert_alpha() for name in index['pages']] # One file open per page
+        for key, rects in index['folders'].items():
+            cls.entries[key] = [pages[page].subsurface((x, y, w, h)) for page, x, y, w, h in rects]
+        for key, (page, x, y, w, h) in index['images'].items():
+            cls.entries[key] = pages[page].subsurface((x, y, w, h))
+        return cls.entries
+
+    @classmethod
+    def folder(cls, path): # Frames of a folder, or None if the folder is not in the atlas
+        frames = cls.load().get(asset_key(path))
+        return list(frames) if frames is not None else None
+
+    @classmethod
+    def image(cls, path): # A single image, or None if it is not in the atlas
+        return cls.load().get(asset_key(path))
+
+def pack(sizes, page_size): # Shelf packing: placing images left to right in rows, starting a new page when full
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1]) # Tallest first keeps rows tight
+    places = [None] * len(sizes) # places[i] = (page, x, y)
+    page, x, y, row_h = 0, 0, 0, 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > page_size: # Starting a new row
+            x, y, row_h = 0, y + row_h + ATLAS_PADDING, 0
+        if y + h > page_size: # Starting a new page
+            page, x, y, row_h = page + 1, 0, 0, 0
+        places[i] = (page, x, y)
+        x += w + ATLAS_PADDING
+        row_h = max(row_h, h)
+    return places
+
+def build_atlas(page_size=ATLAS_PAGE_SIZE): # Packing every source image into atlas pages and writing the index
+    pygame.display.set_mode((1, 1), pygame.HIDDEN) # convert_alpha needs a display [turns colorkeyed and paletted files into the same pixels import_folder gets]
+    keys = [] # (kind, key) for every packed image
+    images = []
+    for folder in ATLAS_FOLDERS:
+        path = join(ASSETS_DIR, folder)
+        if exists(path):
+            for filename in list_frames(path):
+                keys.append(('folders', folder))
+                images.append(pygame.image.load(join(path, filename)).convert_alpha())
+    for image in ATLAS_IMAGES:
+        path = join(ASSETS_DIR, image)
+        if exists(path):
+            keys.append(('images', image))
+            images.append(pygame.image.load(path).convert_alpha())
+
+    places = pack([image.get_size() for image in images], page_size)
+    page_count = max((page for page, x, y in places), default=-1) + 1
+    used = [(0, 0)] * page_count # Used width and height of each page, so pages are saved cropped
+    for (page, x, y), image in zip(places, images):
+        w, h = image.get_size()
+        used[page] = (max(used[page][0], x + w), max(used[page][1], y + h))
+    pages = [pygame.Surface(size, pygame.SRCALPHA) for size in used]
+
+    index = {'pages': [], 'folders': {}, 'images': {}, 'sources': source_stamp()}
+    for (kind, key), (page, x, y), image in zip(keys, places, images):
+        pages[page].blit(image, (x, y), special_flags=pygame.BLEND_RGBA_MAX) # Copying pixels exactly [plain blending would drop the colour of transparent pixels]
+        rect = [page, x, y, image.get_width(), image.get_height()]
+        if kind == 'folders':
+            index['folders'].setdefault(key, []).append(rect) # Frames stay in folder order
+        else:
+            index['images'][key] = rect
+
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    for i, page in enumerate(pages):
+        name = f'atlas_{i}.png'
+        pygame.image.save(page, join(ATLAS_DIR, name))
+        index['pages'].append(name)
+    with open(ATLAS_INDEX, 'w') as file:
+        json.dump(index, file)
+    print(f"Packed {len(images)} images into {len(pages)} atlas page(s) in {ATLAS_DIR}")
+
+if __name__ == '__main__':
+    build_atlas()
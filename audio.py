@@ -0,0 +1,97 @@
+import pygame
+from os.path import exists
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from settings import *
+
+class AudioManager: # Sound effects on reserved channel pools with throttling, and music preloaded in the background with crossfades
+    def __init__(self, categories=SOUND_CHANNELS):
+        self.enabled = pygame.mixer.get_init() is not None # Everything is silently skipped without an audio device
+        self.sounds = {} # Dictionary mapping a sound name to (sound, category)
+        self.recent = {} # Dictionary mapping a sound name to the start times inside the throttle window
+        self.pools = {} # Dictionary mapping a category to its channels
+        self.started = {} # Dictionary mapping a channel to the time its sound started [the oldest is reused when the pool is full]
+        self.muted = False
+
+        # Music
+        self.loader = ThreadPoolExecutor(max_workers=1) # Decoding music files off the main thread
+        self.tracks = {} # Dictionary mapping a track name to the Future of its decoded Sound
+        self.current_track = None # Track playing or waiting for its file to finish loading
+        self.pending = False # True while current_track waits for its file
+        if not self.enabled:
+            return
+
+        # Reserving channels so sound effects never steal each other's or the music's channels
+        total = sum(categories.values()) + 2 # Two music channels for crossfading
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+        index = 0
+        for category, count in categories.items():
+            self.pools[category] = [pygame.mixer.Channel(index + i) for i in range(count)]
+            index += count
+        self.music_channels = [pygame.mixer.Channel(index), pygame.mixer.Channel(index + 1)]
+        self.music_channel = 0 # Index of the channel playing the current track
+
+    def load_sound(self, name, path, category, volume=SFX_VOLUME):
+        if not self.enabled or not exists(path):
+            return
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(volume)
+        self.sounds[name] = (sound, category)
+        self.recent[name] = deque()
+
+    def play(self, name): # Starting a sound unless the same sound already started too often in the throttle window
+        if self.muted or name not in self.sounds:
+            return
+        now = pygame.time.get_ticks()
+        recent = self.recent[name]
+        while recent and now - recent[0] > SOUND_THROTTLE_MS:
+            recent.popleft()
+        if len(recent) >= SOUND_MAX_PER_WINDOW: # Dozens of hits in one frame sound the same as two
+            return
+        recent.append(now)
+        sound, category = self.sounds[name]
+        pool = self.pools[category]
+        channel = next((channel for channel in pool if not channel.get_busy()), None)
+        if channel is None: # Every channel busy: reusing the one that started longest ago
+            channel = min(pool, key=lambda channel: self.started.get(channel, 0))
+        channel.play(sound)
+        self.started[channel] = now
+
+    def preload_music(self, name, path): # Starting to decode a music file in the background
+        if self.enabled and exists(path) and name not in self.tracks:
+            self.tracks[name] = self.loader.submit(pygame.mixer.Sound, path)
+
+    def play_music(self, name): # Crossfading to a track, as soon as its file has finished loading
+        if name == self.current_track:
+            return
+        self.current_track = name
+        self.pending = name in self.tracks
+        self.update()
+
+    def update(self): # Called every frame: starting the requested track once it is ready
+        if not self.pending or not self.tracks[self.current_track].done():
+            return
+        self.pending = False
+        try:
+            sound = self.tracks[self.current_track].result()
+        except Exception:
+            print(f"Error playing music: {self.current_track}")
+            return
+        self.music_channels[self.music_channel].fadeout(MUSIC_FADE_MS) # Fading the old track out while the new one fades in
+        self.music_channel = 1 - self.music_channel
+        channel = self.music_channels[self.music_channel]
+        channel.set_volume(MUSIC_VOLUME)
+        channel.play(sound, loops=-1, fade_ms=MUSIC_FADE_MS)
+        if self.muted: channel.pause()
+
+    def set_muted(self, muted):
+        self.muted = muted
+        if not self.enabled:
+            return
+        if muted:
+            for pool in self.pools.values():
+                for channel in pool: channel.stop() # Cutting off sound effects already playing
+        for channel in self.music_channels:
+            if muted: channel.pause()
+            else: channel.unpause()
@@ -0,0 +1,126 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # Running without a window [must be set before pygame starts]
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy') # Running without a sound card
+
+import sys
+import json
+import math
+import argparse
+from time import perf_counter
+import pygame
+from settings import *
+from main import Game
+
+# Scripted scenarios [wave = starting wave, enemies = extra enemies spawned at once on top of the wave]
+SCENARIOS = {
+    'wave1': {'wave': 1, 'enemies': 0, 'seed': 1},
+    'boss': {'wave': 5, 'enemies': 0, 'seed': 2},
+    'stress_500': {'wave': 3, 'enemies': 500, 'seed': 3},
+    'stress_2000': {'wave': 3, 'enemies': 2000, 'seed': 4},
+}
+PHASES = ['update', 'collision', 'draw'] # Timed parts of every frame
+PERCENTILES = [50, 95, 99]
+
+def percentile(values, pct): # Nearest-rank percentile of a list of numbers
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def scripted_input(game, frame): # Replacing keyboard and mouse with a fixed movement pattern
+    player = game.player
+    angle = frame * 0.02 # Walking in a slow circle
+    player.direction.x = round(math.cos(angle))
+    player.direction.y = round(math.sin(angle))
+    if player.can_shoot and player.can_attack: # Shooting whenever the cooldown allows
+        player.shoot()
+        player.can_shoot = False
+        player.shoot_time = game.sim_clock.ticks()
+
+def run_scenario(game, name, frames, warmup):
+    scenario = SCENARIOS[name]
+    game.start_new_game(seed=scenario['seed']) # Same spawns on every run
+    game.state = 'GAME' # Skipping the countdown
+    game.wave = scenario['wave']
+    game.start_new_wave()
+    game.in_wave = True # Skipping the pause before the wave
+    game.player.health = game.player.max_health = 10 ** 9 # Player never dies so every frame is comparable
+    for _ in range(scenario['enemies']):
+        game.spawn_enemy()
+
+    frame_counter = [0]
+    game.player.input = lambda: scripted_input(game, frame_counter[0]) # Player.update calls input() every step
+    dt = 1 / SIM_FPS # Fixed step so the simulation is the same on every machine
+    times = {phase: [] for phase in PHASES}
+
+    for frame in range(warmup + frames):
+        frame_counter[0] = frame
+        pygame.event.pump() # Keeping SDL responsive
+        t0 = perf_counter()
+        game.all_sprites.save_positions()
+        game.update_world(dt)
+        t1 = perf_counter()
+        game.check_collisions()
+        t2 = perf_counter()
+        game.all_sprites.custom_draw(game.player)
+        t3 = perf_counter()
+        if frame >= warmup: # Ignoring the first frames [caches filling up]
+            times['update'].append((t1 - t0) * 1000)
+            times['collision'].append((t2 - t1) * 1000)
+            times['draw'].append((t3 - t2) * 1000)
+
+    result = {} # Dictionary mapping phase to its percentiles in milliseconds
+    for phase in PHASES:
+        result[phase] = {f'p{pct}': round(percentile(times[phase], pct), 4) for pct in PERCENTILES}
+    return result
+
+def compare(results, baseline, tolerance): # Printing the change against a stored run, returning the regressions
+    regressions = []
+    for name, phases in results.items():
+        if name not in baseline:
+            continue
+        for phase, values in phases.items():
+            old = baseline[name].get(phase, {}).get('p95')
+            new = values['p95']
+            if not old:
+                continue
+            ratio = new / old
+            print(f"  {name:<12} {phase:<10} p95 {old:8.3f} -> {new:8.3f} ms  ({ratio:5.2f}x)")
+            if ratio > tolerance:
+                regressions.append(f"{name}.{phase}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless game loop benchmark')
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help='scenarios to run (default: all)')
+    parser.add_argument('--frames', type=int, default=600, help='measured frames per scenario')
+    parser.add_argument('--warmup', type=int, default=60, help='frames run before measuring')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='compare against results stored by an earlier --json run')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='p95 ratio over the baseline that counts as a regression')
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+
+    game = Game()
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(game, name, args.frames, args.warmup)
+        row = '  '.join(f"{phase} " + '/'.join(f"{results[name][phase][f'p{pct}']:.3f}" for pct in PERCENTILES) for phase in PHASES)
+        print(f"{name:<12} {row}  (ms p50/p95/p99)")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSIONS: " + ', '.join(regressions))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+from settings import *
+
+CELL_OFFSET = 1 << 20 # Shifts cell coordinates so negative cells still give positive keys
+
+def expand_runs(start, counts): # Owner index and position of every element in runs [start[k], start[k] + counts[k])
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(start, counts) + within
+
+def covered_cells(boxes, cell_size): # (box index, cell key) for every grid cell each (left, top, right, bottom) box touches
+    first = np.floor(boxes[:, :2] / cell_size).astype(np.int64)
+    last = np.floor(boxes[:, 2:] / cell_size).astype(np.int64)
+    span = last - first + 1 # Cells covered along x and y
+    owner, cell = expand_runs(np.zeros(len(boxes), np.int64), span[:, 0] * span[:, 1])
+    cx = first[owner, 0] + cell % span[owner, 0]
+    cy = first[owner, 1] + cell // span[owner, 0]
+    return owner, (cx + CELL_OFFSET) * (CELL_OFFSET * 2) + (cy + CELL_OFFSET)
+
+class EnemyBroadphase: # Grid of the enemies' positions, rebuilt once per step, answering swept and overlap queries
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.build([])
+
+    def build(self, enemies): # Storing every enemy's rect and hitbox and sorting them by grid cell
+        self.enemies = list(enemies)
+        boxes = np.array([(*enemy.rect, *enemy.hitbox) for enemy in self.enemies], dtype=np.float64).reshape(-1, 8)
+        self.rects = np.concatenate((boxes[:, :2], boxes[:, :2] + boxes[:, 2:4]), axis=1) # (left, top, right, bottom)
+        self.hitboxes = np.concatenate((boxes[:, 4:6], boxes[:, 4:6] + boxes[:, 6:8]), axis=1)
+        bounds = np.concatenate((np.minimum(self.rects[:, :2], self.hitboxes[:, :2]), np.maximum(self.rects[:, 2:], self.hitboxes[:, 2:])), axis=1)
+        owner, keys = covered_cells(bounds, self.cell_size)
+        order = np.argsort(keys, kind='stable')
+        self.cell_keys = keys[order] # Sorted cell key of every (enemy, cell) entry
+        self.cell_enemies = owner[order] # Enemy index of every entry
+
+    def candidates(self, boxes): # Unique (box index, enemy index) pairs sharing at least one grid cell
+        if not len(boxes) or not len(self.enemies):
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        owner, keys = covered_cells(boxes, self.cell_size)
+        start = np.searchsorted(self.cell_keys, keys, 'left')
+        counts = np.searchsorted(self.cell_keys, keys, 'right') - start # Enemies in each cell the box touches
+        entry, position = expand_runs(start, counts)
+        pairs = np.unique(owner[entry] * len(self.enemies) + self.cell_enemies[position]) # Removing pairs found in several cells
+        return pairs // len(self.enemies), pairs % len(self.enemies)
+
+    def sweep(self, start, end, half_size): # First enemy rect hit by each moving box, as (box index, enemy index) arrays
+        boxes = np.concatenate((np.minimum(start, end) - half_size, np.maximum(start, end) + half_size), axis=1) # Box around the whole movement
+        i, j = self.candidates(boxes)
+        if not len(i):
+            return i, j
+        # Slab test of the segment start -> end against each enemy rect grown by the moving box's half size
+        origin, delta = start[i], end[i] - start[i]
+        low, high = self.rects[j, :2] - half_size, self.rects[j, 2:] + half_size
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t1, t2 = (low - origin) / delta, (high - origin) / delta
+        still = delta == 0 # Axes without movement only hit if already between the slabs
+        inside = (origin > low) & (origin < high)
+        t_near = np.where(still, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2)).max(axis=1)
+        t_far = np.where(still, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2)).min(axis=1)
+        hit = (t_near < t_far) & (t_far > 0) & (t_near <= 1)
+        i, j, t = i[hit], j[hit], t_near[hit]
+        order = np.lexsort((t, i)) # Per box, earliest hit first
+        i, j = i[order], j[order]
+        first = np.ones(len(i), bool)
+        first[1:] = i[1:] != i[:-1]
+        return i[first], j[first]
+
+    def overlapping(self, rect): # Enemies whose hitbox overlaps the rectangle
+        box = np.array([[rect.left, rect.top, rect.right, rect.bottom]], dtype=np.float64)
+        i, j = self.candidates(box)
+        hitboxes = self.hitboxes[j]
+        hit = (hitboxes[:, 0] < box[0, 2]) & (hitboxes[:, 2] > box[0, 0]) & (hitboxes[:, 1] < box[0, 3]) & (hitboxes[:, 3] > box[0, 1])
+        return [self.enemies[k] for k in j[hit]]
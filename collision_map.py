@@ -0,0 +1,77 @@
+import os
+import json
+import pygame
+from os.path import join, exists, dirname, normpath, relpath
+from xml.etree import ElementTree
+from settings import *
+from sprites import object_footprint
+
+COMPILE_VERSION = 2 # Bumped whenever the compiled output changes, so old caches are rebuilt
+
+def merge_rects(rects): # Dropping rects inside another and joining pairs whose union is exactly one rect, until nothing changes
+    rects = sorted({tuple(rect) for rect in rects}, key=lambda rect: (rect[1], rect[0])) # Unique (x, y, w, h), top to bottom
+    merged = True
+    while merged:
+        merged = False
+        for i, a in enumerate(rects):
+            ra = pygame.Rect(a)
+            for j in range(i + 1, len(rects)):
+                rb = pygame.Rect(rects[j])
+                if ra.contains(rb) or rb.contains(ra) or (ra.left == rb.left and ra.width == rb.width and ra.top <= rb.bottom and rb.top <= ra.bottom) \
+                        or (ra.top == rb.top and ra.height == rb.height and ra.left <= rb.right and rb.left <= ra.right): # Same column or row, touching or overlapping
+                    rects[i] = tuple(ra.union(rb))
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [pygame.Rect(rect) for rect in rects]
+
+def compile_collision_rects(tmx_data): # Merged blocking rects of the map, as a dictionary of rect lists
+    footprints = [object_footprint(obj.image.get_rect(topleft=(obj.x, obj.y))) for obj in tmx_data.get_layer_by_name('Objects') if obj.image]
+    return {
+        'objects': merge_rects(footprints), # Player, enemies and the flow field [the authored 'Collisions' shapes are loose boxes around the ledges and cover walkable ground]
+    }
+
+def map_sources(): # The map, the tilesets it references and their images [the object footprints come from the image sizes]
+    sources = [MAP_PATH]
+    for tileset in ElementTree.parse(MAP_PATH).iter('tileset'):
+        if tileset.get('source'): # External .tsx file
+            path = normpath(join(dirname(MAP_PATH), tileset.get('source')))
+            sources.append(path)
+            sources += [normpath(join(dirname(path), image.get('source'))) for image in ElementTree.parse(path).iter('image')]
+        else: # Tileset embedded in the map
+            sources += [normpath(join(dirname(MAP_PATH), image.get('source'))) for image in tileset.iter('image')]
+    return sources
+
+def map_stamp(): # Identifies the version of every source file a cache was compiled from
+    stamp = [COMPILE_VERSION]
+    for path in map_sources():
+        stat = os.stat(path)
+        stamp.append([relpath(path, ASSETS_DIR).replace(os.sep, '/'), stat.st_size, stat.st_mtime_ns])
+    return stamp
+
+def load_collision_rects(tmx_data): # Compiled rects from the cache next to the map, recompiling when the map has changed
+    if exists(COLLISION_CACHE_PATH):
+        with open(COLLISION_CACHE_PATH) as file:
+            cache = json.load(file)
+        if cache.get('stamp') == map_stamp():
+            return {name: [pygame.Rect(flat[i:i + 4]) for i in range(0, len(flat), 4)] for name, flat in cache['rects'].items()} # Flat [x, y, w, h, x, y, w, h, ...] arrays
+    rects = compile_collision_rects(tmx_data)
+    save_collision_rects(rects)
+    return rects
+
+def save_collision_rects(rects):
+    try:
+        with open(COLLISION_CACHE_PATH, 'w') as file:
+            json.dump({'stamp': map_stamp(), 'rects': {name: [value for rect in group for value in rect] for name, group in rects.items()}}, file)
+    except OSError: # Read-only install, the rects are simply compiled again next time
+        print("WARNING: could not write " + COLLISION_CACHE_PATH)
+
+if __name__ == '__main__':
+    import pytmx
+    pygame.display.set_mode((1, 1), pygame.HIDDEN) # Loading the map's tile images needs a display
+    tmx_data = pytmx.util_pygame.load_pygame(MAP_PATH)
+    rects = compile_collision_rects(tmx_data)
+    save_collision_rects(rects)
+    print(f"Compiled {len(rects['objects'])} object collision rects into {COLLISION_CACHE_PATH}")
@@ -1,28 +1,205 @@
+import math
 import pygame
+from bisect import bisect_left, bisect_right
 from settings import *
-from sprites import Player
+from sprites import Player, Sprite
+from resolution import max_scale
+from ui import HealthBarCache
 
 class CameraGroup(pygame.sprite.Group): # Creating a class named CamerGroup that inherits from pygame.sprite.Group
-    def __init__(self): # Initializing the class (start-up)   
+    def __init__(self, profiler=None): # Initializing the class (start-up)   
         super().__init__()  # Calling the parent class's to initialize the child class
         self.display_surface = pygame.display.get_surface() # Storing the main display surface in a variable
         self.offset = pygame.math.Vector2() # Creating a vector to store the shifted values for camera movement
+        self.profiler = profiler # Optional FrameProfiler timing each layer
+        self.render_level = 1 # Resolution the world is drawn at, as a fraction of the largest allowed [set by ResolutionScaler]
+        self.render_surface = None # World at the render resolution, upscaled to the window [unused at full scale]
+        self.surface = self.display_surface # Surface the world is drawn to in the current frame
+        self.scaled_images = {} # Dictionary mapping a render scale to {image: copy scaled to it} [images are bounded: frames, chunks, bars]
+        self.scaled_window = None # Window size the scaled copies were made for
+        self.cull_margin = 100 # Pixels around the screen where sprites are still drawn [set from the quality tier]
+        self.health_bars = True # Drawing enemy health bars [set from the quality tier]
+        self.bar_cache = HealthBarCache() # Pre-rendered enemy health bars
      
         # Map limits
         self.map_width = 0 
         self.map_height = 0
         self.ui_font = pygame.font.SysFont("arial", 18, bold=True) 
 
+        # Pre-baked ground
+        self.ground_chunks = {} # Dictionary mapping (chunk_x, chunk_y) to a pre-rendered ground surface
+        self.chunk_pixels = CHUNK_SIZE * TILE_SIZE # Size of one chunk in pixels
+
+        # Per-layer render buckets
+        self.pending = {} # Sprites added since the last draw [z and rect are only set after a sprite joins its groups]
+        self.bucket_of = {} # Dictionary mapping each sprite to the bucket it was placed in
+        self.layer_buckets = {LAYERS['ground']: {}, LAYERS['top']: {}} # Unsorted layers, drawn in insertion order
+        self.static_main = {} # Main layer sprites that never move [map objects, border trees]
+        self.dynamic_main = {} # Main layer sprites that move [player, gun, enemies]
+        self.static_sorted = [] # Static main sprites sorted by rect.centery [rebuilt only when static_dirty is set]
+        self.static_keys = [] # rect.centery of each sprite in static_sorted, used for bisect
+        self.static_half_height = 0 # Half the height of the tallest static main sprite [plus one for rounding]
+        self.static_dirty = False # Flag to re-sort the static main sprites before the next draw
+
+        # Interpolation between fixed simulation steps
+        self.prev_centers = {} # Dictionary mapping each moving sprite to its rect.center before the last step
+        self.alpha = 1 # Fraction of the next step already elapsed [1 = draw at the current position]
+        self.projectiles = None # Optional ProjectilePool drawn on top of the main layer
+
+    def add_internal(self, sprite, layer=None): # Called by pygame whenever a sprite joins this group
+        super().add_internal(sprite, layer)
+        self.pending[sprite] = True # Sorting into a bucket is deferred until the next draw
+
+    def remove_internal(self, sprite): # Called by pygame whenever a sprite leaves this group [kill, remove, empty]
+        super().remove_internal(sprite)
+        self.pending.pop(sprite, None)
+        self.prev_centers.pop(sprite, None)
+        bucket = self.bucket_of.pop(sprite, None)
+        if bucket is not None:
+            del bucket[sprite] # Removing the sprite from its bucket
+            if bucket is self.static_main: 
+                self.static_dirty = True 
+
+    def sort_buckets(self): # Placing newly added sprites into their layer bucket
+        for sprite in self.pending:
+            if sprite.z == LAYERS['main']:
+                if isinstance(sprite, Sprite): # Static world sprites
+                    bucket = self.static_main
+                    self.static_dirty = True
+                else: 
+                    bucket = self.dynamic_main
+            else: 
+                bucket = self.layer_buckets.setdefault(sprite.z, {})
+            bucket[sprite] = True
+            self.bucket_of[sprite] = bucket
+        self.pending.clear()
+
+        if self.static_dirty: # Sorting static sprites only when the static set has changed
+            self.static_sorted = sorted(self.static_main, key=lambda sprite: sprite.rect.centery)
+            self.static_keys = [sprite.rect.centery for sprite in self.static_sorted]
+            self.static_half_height = max((sprite.rect.height // 2 + 1 for sprite in self.static_sorted), default=0)
+            self.static_dirty = False
+
+    def save_positions(self): # Called before every simulation step so drawing can blend the last two steps
+        self.sort_buckets()
+        for sprite in self.dynamic_main:
+            self.prev_centers[sprite] = sprite.rect.center
+
+    def draw_topleft(self, sprite): # World position to draw a sprite at, blended between its previous and current step
+        prev = self.prev_centers.get(sprite)
+        if prev is None or self.alpha >= 1: # Static sprites and sprites created during the last step
+            return sprite.rect.topleft
+        back = 1 - self.alpha # How far back towards the previous position to draw
+        return (sprite.rect.x - round((sprite.rect.centerx - prev[0]) * back), sprite.rect.y - round((sprite.rect.centery - prev[1]) * back))
+
+    def main_draw_order(self, screen_h): # Merging the moving sprites into the static order in linear time
+        # Only statics whose centery can pass the culling test are considered [rect within cull_margin of the screen]
+        lo = bisect_left(self.static_keys, self.offset.y - self.cull_margin - self.static_half_height)
+        hi = bisect_right(self.static_keys, self.offset.y + screen_h + self.cull_margin + self.static_half_height)
+        statics = self.static_sorted
+        dynamics = sorted(self.dynamic_main, key=lambda sprite: sprite.rect.centery) # Only the few moving sprites are sorted every frame
+        order = []
+        start = lo
+        for sprite in dynamics:
+            pos = bisect_right(self.static_keys, sprite.rect.centery, lo, hi) # Static sprites on the same row are drawn first
+            order.extend(statics[start:pos]) 
+            order.append(sprite)
+            start = pos
+        order.extend(statics[start:hi])
+        return order
+
+    def view_rect(self, center, screen_size): # World area the camera shows when following a point [the same in headless replays, which never draw]
+        view = pygame.Rect((0, 0), screen_size)
+        view.center = center
+        view.left = max(view.left, 0) # Same limits as custom_draw
+        view.top = max(view.top, 0)
+        view.right = min(view.right, self.map_width)
+        view.bottom = min(view.bottom, self.map_height)
+        return view
+
     def set_map_limits(self, width, height):
         self.map_width = width # 3328 
         self.map_height = height # 3200 
+
+    def bake_ground(self, tiles): # Drawing all ground tiles into fixed-size chunk surfaces once, when the map loads
+        self.ground_chunks = {}
+        for x, y, surf in tiles: # tiles = (tile_x, tile_y, surface) as returned by the TMX layer
+            key = (x // CHUNK_SIZE, y // CHUNK_SIZE) # Chunk that contains this tile
+            if key not in self.ground_chunks:
+                chunk = pygame.Surface((self.chunk_pixels, self.chunk_pixels)).convert() # Opaque surface [faster to blit than alpha]
+                chunk.fill(BG_COLOR) # Filling empty tile slots with the background color
+                self.ground_chunks[key] = chunk
+            self.ground_chunks[key].blit(surf, ((x % CHUNK_SIZE) * TILE_SIZE, (y % CHUNK_SIZE) * TILE_SIZE)) # Drawing the tile at its position inside the chunk
+
+    def draw_ground(self, screen_w, screen_h, blits): # Adding the pre-baked chunks that overlap the camera to a blits list
+        size = self.chunk_pixels
+        first_x = int(self.offset.x) // size # First chunk column overlapping the camera
+        first_y = int(self.offset.y) // size # First chunk row overlapping the camera
+        last_x = int(self.offset.x + screen_w) // size # Last chunk column overlapping the camera
+        last_y = int(self.offset.y + screen_h) // size # Last chunk row overlapping the camera
+        for cy in range(first_y, last_y + 1):
+            for cx in range(first_x, last_x + 1):
+                chunk = self.ground_chunks.get((cx, cy))
+                if chunk: # Skipping chunks outside the map
+                    blits.append((chunk, (cx * size - self.offset.x, cy * size - self.offset.y))) # Drawing the whole chunk in one blit
     
-    def custom_draw(self, player):
-        screen_w, screen_h = self.display_surface.get_size()
+    def render_scale(self): # Resolution the world is drawn at, as a fraction of the window [capped at RENDER_MAX_PIXELS]
+        return max_scale(self.display_surface.get_size()) * self.render_level
+
+    def render_size(self): # Size of the render surface in pixels [the window size at full scale, the world view is always window-sized]
+        window_w, window_h = self.display_surface.get_size()
+        scale = self.render_scale()
+        if scale >= 1:
+            return window_w, window_h
+        return max(1, int(window_w * scale)), max(1, int(window_h * scale))
+
+    def render_target(self): # Surface the world is drawn to: the window itself, or a smaller surface reused while the size stays the same
+        size = self.render_size()
+        if size == self.display_surface.get_size():
+            return self.display_surface
+        if self.render_surface is None or self.render_surface.get_size() != size:
+            self.render_surface = pygame.Surface(size).convert() # Opaque [the world covers every pixel]
+        return self.render_surface
+
+    def present(self): # Upscaling the world to the window when it was drawn at a lower resolution
+        if self.surface is self.display_surface:
+            return
+        window = self.display_surface
+        if window.get_clip() == window.get_rect():
+            pygame.transform.scale(self.surface, window.get_size(), window) # Straight into the window [no temporary surface]
+        else: # transform.scale ignores the clip of idle screens that only redraw part of the window
+            window.blit(pygame.transform.scale(self.surface, window.get_size()), (0, 0))
+        if self.profiler: self.profiler.lap('upscale')
+
+    def scaled_copies(self, scale): # Dictionary of image copies for one render scale [filled by scaled_image the first time each image is drawn]
+        window = self.display_surface.get_size()
+        if window != self.scaled_window: # Other render scales after a resize
+            self.scaled_images, self.scaled_window = {}, window
+        return self.scaled_images.setdefault(scale, {})
+
+    def scaled_image(self, image, copies, scale): # Image at the render scale, scaled once [rounded up so neighbouring chunks leave no gaps]
+        copy = copies.get(image)
+        if copy is None:
+            w, h = image.get_size()
+            copy = copies[image] = pygame.transform.scale(image, (max(1, math.ceil(w * scale)), max(1, math.ceil(h * scale))))
+        return copy
+
+    def scale_blits(self, blits, scale, copies): # Turning (image, world view position) pairs into (scaled image, render surface position) pairs
+        if scale == 1:
+            return blits
+        return [(self.scaled_image(image, copies, scale), (x * scale, y * scale)) for image, (x, y) in blits]
+
+    def custom_draw(self, player, alpha=1):
+        self.surface = self.render_target()
+        screen_w, screen_h = self.display_surface.get_size() # World view in world pixels [the same at every render scale]
+        scale = self.surface.get_width() / screen_w # Render surface pixels per world pixel
+        copies = self.scaled_copies(scale) if scale != 1 else None
+        self.alpha = alpha # Fraction of the next simulation step already elapsed
+        player_x, player_y = self.draw_topleft(player) # Following the interpolated player so the camera moves smoothly
         
         # Offset = Player's Real Position - Center of Screen
-        self.offset.x = player.rect.centerx - screen_w // 2 # Determining the center x-coordinate of the player relative to the screen center 
-        self.offset.y = player.rect.centery - screen_h // 2 # Determining the center y-coordinate of the player relative to the screen center
+        self.offset.x = player_x + player.rect.width // 2 - screen_w // 2 # Determining the center x-coordinate of the player relative to the screen center 
+        self.offset.y = player_y + player.rect.height // 2 - screen_h // 2 # Determining the center y-coordinate of the player relative to the screen center
 
  # Preventing camera from moving beyond map boundaries
         # Left Boundary
@@ -38,58 +215,72 @@ class CameraGroup(pygame.sprite.Group): # Creating a class named CamerGroup that
         if self.offset.y > self.map_height - screen_h: 
             self.offset.y = self.map_height - screen_h
 
-        self.display_surface.fill(BG_COLOR)
+        self.surface.fill(BG_COLOR)
+        self.sort_buckets() # Placing sprites added since the last frame into their buckets
+
+        ox, oy = self.offset
+        left, top = -self.cull_margin, -self.cull_margin # Culling bounds: sprites are drawn if their rect overlaps the screen grown by cull_margin
+        right, bottom = screen_w + self.cull_margin, screen_h + self.cull_margin
 
+        # Every layer collects (surface, position) pairs and submits them in one Surface.blits call [no Python call per sprite]
         # 1. Draw Ground
-        for sprite in self.sprites(): # Iterating through all sprites in the group
-            if sprite.z == LAYERS['ground']: # Selecting only ground layer sprites for drawing
-                offset_pos = sprite.rect.topleft - self.offset # Calculating the position to draw
-                if -100 < offset_pos.x < screen_w + 100 and -100 < offset_pos.y < screen_h + 100: # Culling: Only drawing if within screen bounds [with a buffer of 100 pixels, lowers rendering & improves fps]
-                    self.display_surface.blit(sprite.image, offset_pos) # Drawing the sprite on the display surface at the calculated position [blitt = drawing]
-
-        # 2. Draw Main Sprites
-        main_sprites = [] # List to hold main layer sprites
-        for s in self.sprites(): # Iterating through all sprites in the group
-            if s.z == LAYERS['main']: # Selecting only main layer sprites for drawing
-                main_sprites.append(s) # Adding the sprite to the main_sprites list 
-
-        def get_y_position(sprite): 
-            return sprite.rect.centery # Returning the center y-coordinate of the sprite's rectangle
-        sorted_sprites = sorted(main_sprites, key=get_y_position) # Sorting the main sprites based on their y-coordinate to ensure correct layering (sprites lower on the screen are drawn last)
-
-
-        for sprite in sorted_sprites: 
-            offset_pos = sprite.rect.topleft - self.offset  # Calculating the position to draw (converting world coordinates to screen coordinates)
-            
-            if -100 < offset_pos. x < screen_w + 100 and -100 < offset_pos.y < screen_h + 100: # Culling: Only drawing if within screen bounds [with a buffer of 100 pixels, lowers rendering & improves fps]
-                self.display_surface.blit(sprite.image, offset_pos) # Drawing the sprite on the display surface at the calculated position
-
-                # Mob Health Bar
-                if hasattr(sprite, 'enemy_name') and sprite.enemy_name != 'boss': # Checking if the sprite has an 'enemy_name' attribute (indicating it's an enemy) and is not a boss 
-                    # a. Calculating Health Percentage
-                    current_hp = sprite.health 
-                    max_hp = sprite.max_health 
-                    health_percentage = current_hp / max_hp
-
-                    # b. Deciding where to draw the bar
-                    bar_x = offset_pos.x # Align with left side of enemy
-                    bar_y = offset_pos.y - 10 # 10 pixels ABOVE the enemy's head
-                    bar_w = sprite.rect.width # Same width as the enemy
-                    bar_h = 4 # 4 pixels tall
-
-                    # c. Drawing the Black Background
-                    bg_rect = pygame.Rect(bar_x, bar_y, bar_w, bar_h)
-                    pygame.draw.rect(self.display_surface, 'black', bg_rect)
-
-                    # d. Drawing the Red Health 
-                    current_health_width = bar_w * health_percentage 
-                    
-                    health_rect = pygame.Rect(bar_x, bar_y, current_health_width, bar_h)
-                    pygame.draw.rect(self.display_surface, 'red', health_rect)
-        
+        blits = []
+        self.draw_ground(screen_w, screen_h, blits) # Only the pre-baked chunks that overlap the camera
+        for sprite in self.layer_buckets[LAYERS['ground']]: # Any remaining ground layer sprites
+            x, y = sprite.rect.x - ox, sprite.rect.y - oy # Calculating the position to draw
+            if left - sprite.rect.width < x < right and top - sprite.rect.height < y < bottom: 
+                blits.append((sprite.image, (x, y)))
+        self.surface.blits(self.scale_blits(blits, scale, copies), doreturn=False)
+        if self.profiler: self.profiler.lap('ground')
+
+        # 2. Draw Main Sprites [sorted by y-coordinate so sprites lower on the screen are drawn last]
+        blits = []
+        health_bars = self.health_bars
+        for sprite in self.main_draw_order(screen_h): 
+            x, y = self.draw_topleft(sprite) # Converting world coordinates to screen coordinates
+            x -= ox; y -= oy
+            rect = sprite.rect
+            if left - rect.width < x < right and top - rect.height < y < bottom: # Culling [wide border strips start far off-screen]
+                blits.append((sprite.image, (x, y)))
+                if health_bars and getattr(sprite, 'enemy_name', 'boss') != 'boss': # Mob health bar 10 pixels above the enemy [the boss has its own on the HUD]
+                    blits.append((self.bar_cache.get(rect.width, sprite.health, sprite.max_health), (x, y - 10)))
+        self.surface.blits(self.scale_blits(blits, scale, copies), doreturn=False) # Health bars follow their enemy in the list, so the draw order is unchanged
+
+        if self.projectiles: # All projectiles in one batched blit
+            image = self.scaled_image(self.projectiles.image, copies, scale) if copies is not None else self.projectiles.image
+            self.projectiles.draw(self.surface, self.offset, alpha, scale, image)
+        if self.profiler: self.profiler.lap('main')
+
         # 3. Draw Top Layer
-        for sprite in self.sprites(): # Iterating through all sprites in the group
-            if sprite.z == LAYERS['top']: # Selecting only top layer sprites for drawing
-                 offset_pos = sprite.rect.topleft - self.offset # Calculating the position to draw
-                 self.display_surface.blit(sprite.image, offset_pos) # Drawing the sprite on the display surface at the calculated position
+        self.surface.blits(self.scale_blits([(sprite.image, (sprite.rect.x - ox, sprite.rect.y - oy)) for sprite in self.layer_buckets[LAYERS['top']]], scale, copies), doreturn=False)
+        if self.profiler: self.profiler.lap('top')
+        self.present() # The HUD is drawn afterwards, at the window's resolution
+
+
+class SpatialGrid: # Uniform grid that stores static colliders by the cells their hitboxes cover
+    def __init__(self, sprites=(), cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size # Size of each cell in pixels
+        self.cells = {} # Dictionary mapping (cell_x, cell_y) to a list of sprites
+        for sprite in sprites:
+            self.add(sprite)
+
+    def cell_range(self, rect): # Cells covered by a rectangle [inclusive on both ends]
+        size = self.cell_size
+        return (rect.left // size, rect.top // size, (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def add(self, sprite):
+        left, top, right, bottom = self.cell_range(sprite.hitbox)
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                self.cells.setdefault((cx, cy), []).append(sprite) # Storing the sprite in every cell its hitbox touches
 
+    def query(self, rect): # Returning every stored sprite that shares a cell with the rectangle
+        left, top, right, bottom = self.cell_range(rect)
+        found = {} # Dictionary used as an ordered set [a sprite can be stored in several cells]
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    for sprite in cell:
+                        found[sprite] = True
+        return list(found)
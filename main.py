@@ -1,15 +1,31 @@
 import pygame
+import os
 import sys
+import time
 import math
 import random
+import numpy as np
 from os.path import join, exists
 import pytmx # For loading Tiled map files
 from settings import *
-from groups import CameraGroup
-from sprites import Player, Enemy, Sprite, import_folder
+from groups import CameraGroup, SpatialGrid
+from profiler import FrameProfiler
+from projectiles import ProjectilePool
+from swarm import SwarmController
+from broadphase import EnemyBroadphase
+from navigation import FlowField
+from collision_map import load_collision_rects
+from registry import UpdateRegistry
+from audio import AudioManager
+from resolution import ResolutionScaler
+from quality import QualityGovernor
+from radar import ThreatRadar
+from replay import GameClock, RandomStreams, InputState, InputRecorder
+from ui import TextCache, OverlayCache, PulseCache
+from sprites import Player, Enemy, Sprite, Collider, AnimationClip, import_folder, load_image, make_strip
 
 class Game:
-    def __init__(self): # Initializing the Game class
+    def __init__(self, record_dir=None): # Initializing the Game class [record_dir = folder that receives a recording of every game]
         pygame.init() # Initializing all imported pygame modules
         self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE) # Creating the main display surface with specified width and height
         pygame.display.set_caption('FOREST OF THE CRYSTAL KNIGHT') # Setting the window title
@@ -17,9 +33,23 @@ class Game:
         self.font = pygame.font.SysFont("arial", 40, bold=True) # Creating a font object for rendering text
         self.ui_font = pygame.font.SysFont("arial", 20, bold=True) # Font for UI elements
         self.title_font = pygame.font.SysFont("arial", 80, bold=True) # Font for titles
+        self.text_cache = TextCache() # Rendered text surfaces, re-rendered only when their text changes
+        self.overlay = OverlayCache() # Semi-transparent overlay, rebuilt only when the window size changes
+        self.title_pulse = PulseCache(self.title_font.render("FOREST OF THE CRYSTAL KNIGHT", True, '#aaffaa'), 0.95, 1.05) # Pre-scaled menu titles
         self.state = 'MENU' # Initial game state set to 'MENU'
         self.muted = False # Audio is not muted by default
         self.target_fps = 60  # Target frames per second
+        self.profiler = FrameProfiler() # Per-phase frame timings [always collected, shown with F3]
+        self.show_profiler = False # Profiler graph is hidden by default
+        self.resolution = ResolutionScaler(self.profiler) # Render resolution of the world, adjusted to the frame budget
+        self.governor = QualityGovernor(self.profiler) # Quality tier, lowered while frames run over budget
+        self.sim_dt = 1 / SIM_FPS # Length of one fixed simulation step in seconds
+        self.accumulator = 0 # Unsimulated time carried over between frames
+        self.sim_clock = GameClock() # Game time, only advanced by simulation steps
+        self.rng = RandomStreams() # Seeded random streams for spawns, enemies and the boss
+        self.controls = InputState() # Input read by the simulation, captured once per step
+        self.record_dir = record_dir
+        self.recorder = None # InputRecorder of the game in progress
         
         self.play_btn = pygame.Rect(0,0,200,60) # Play button rectangle
         self.instruct_btn = pygame.Rect(0,0,200,60) # Instructions button rectangle
@@ -31,25 +61,36 @@ class Game:
         self.end_menu_btn = pygame.Rect(0,0,200,60) # End menu button rectangle
         self.ui_pause_btn = pygame.Rect(0,0,40,40) # Pause button rectangle
         self.ui_mute_btn = pygame.Rect(0,0,40,40) # Mute button rectangle
+        self.idle_buttons = { # Buttons on each idle screen [hovering them is the only change besides the menu title]
+            'MENU': [self.play_btn, self.instruct_btn],
+            'INSTRUCTIONS': [self.back_btn],
+            'PAUSED': [self.resume_btn, self.mute_btn, self.menu_btn],
+            'GAME_OVER': [self.end_play_btn, self.end_menu_btn],
+            'VICTORY': [self.end_play_btn, self.end_menu_btn],
+        }
+        self.idle_screen = None # (state, window size, muted) of the idle screen currently shown
+        self.idle_hover = None # Index of the hovered button when the idle screen was last drawn
+        self.idle_title = None # Menu title frame when the idle screen was last drawn
         
-        self.all_sprites = CameraGroup() # Group to hold all sprites with camera functionality
+        self.all_sprites = CameraGroup(self.profiler) # Group to hold all sprites with camera functionality
+        self.enemy_sprites = pygame.sprite.Group()
+        self.entities = UpdateRegistry() # Everything that needs update calls [player, gun, enemies]
+        self.border_sprites = pygame.sprite.Group()
+        self.collision_sprites = pygame.sprite.Group() # Compiled footprints of the map objects [player and enemy collision]
+        self.tmx_data = None # Parsed map [loaded by build_world on the first game]
+        self.swarm = SwarmController() # Steering for all regular enemies at once
+        self.broadphase = EnemyBroadphase() # Enemy positions for bullet and player hits, rebuilt every step
+        self.radar = ThreatRadar() # Arrows towards off-screen enemies
+        self.boss = None # Boss of the current game once it has spawned
         self.mobs_killed = 0 # Counter for mobs killed
-        self.current_music_track = None # Currently playing music track
         self.load_assets() # Loading game assets
 
     def load_assets(self):
-        self.audio = {'shoot': None, 'impact': None} # Dictionary to hold audio assets
+        self.audio = AudioManager() # Sound effects on channel pools and background-loaded music
         self.music_files = {} # Dictionary to hold music file paths
-    
-        shoot_path = join(AUDIO_PATH, 'shoot.wav') # Shooting sound effect path
-        impact_path = join(AUDIO_PATH, 'impact.ogg') # Impact sound effect path
-        
-        if exists(shoot_path): 
-            self.audio['shoot'] = pygame.mixer.Sound(shoot_path) # Loading shooting sound effect
-            self.audio['shoot'].set_volume(0.4) # Setting volume for shooting sound effect
-        if exists(impact_path):
-            self.audio['impact'] = pygame.mixer.Sound(impact_path) # Loading impact sound effect
-            self.audio['impact'].set_volume(0.4) # Setting volume for impact sound effect
+
+        self.audio.load_sound('shoot', join(AUDIO_PATH, 'shoot.wav'), 'player') # Shooting sound effect
+        self.audio.load_sound('impact', join(AUDIO_PATH, 'impact.ogg'), 'impact') # Impact sound effect
             
         music_path_ogg = join(AUDIO_PATH, 'music.ogg') # Main game music path
         if exists(music_path_ogg): 
@@ -62,6 +103,8 @@ class Game:
             self.music_files['menu'] = menu_path_ogg # Using OGG if available
         else: 
             self.music_files['menu'] = join(AUDIO_PATH, 'menu.wav') # Fallback to WAV format
+        for track_name, path in self.music_files.items():
+            self.audio.preload_music(track_name, path) # Decoding the tracks in the background while the rest loads
 
         boss_path = join(ENEMY_PATH, 'boss') # Path to boss enemy assets
         boss_assets = {} # Dictionary to hold boss animation frames
@@ -78,101 +121,148 @@ class Game:
             if not boss_assets['move']: 
                 boss_assets['move'] = import_folder(boss_path) # Load all as move animation
 
-        # Loading enemy animation frames
-        self.enemy_frames = {
-            'bat': import_folder(join(ENEMY_PATH, 'bat')),
-            'blob': import_folder(join(ENEMY_PATH, 'blob')),
-            'skeleton': import_folder(join(ENEMY_PATH, 'skeleton')),
-            'boss': boss_assets
+        # Building animation clips once [frames pre-scaled, fallbacks resolved]
+        self.clips = {
+            'bat': {'move': AnimationClip(import_folder(join(ENEMY_PATH, 'bat')), 12)}, # Fast bats
+            'blob': {'move': AnimationClip(import_folder(join(ENEMY_PATH, 'blob')), 6)},
+            'skeleton': {'move': AnimationClip(import_folder(join(ENEMY_PATH, 'skeleton')), 6)},
+            'boss': {},
+            'player': {},
         }
+        for status in ['move', 'attack', 'teleport', 'summon']:
+            frames = boss_assets.get(status) or boss_assets.get('attack' if status == 'summon' else 'move') # Fallbacks for missing animations
+            if frames: 
+                self.clips['boss'][status] = AnimationClip(frames, 8, loop=(status == 'move'), size=(160, 160)) # Scaling boss frames once
+        for direction in ['up', 'down', 'left', 'right']:
+            self.clips['player'][direction] = AnimationClip(import_folder(join(PLAYER_PATH, direction)), 8) # Loading player animation frames
+
+        bullet_surf = load_image(join(GUN_PATH, 'bullet.png')) # Loading the bullet image
+        if not bullet_surf:
+            bullet_surf = pygame.Surface((10,10)); bullet_surf.fill('yellow') # Placeholder bullet surface
+        self.projectiles = ProjectilePool(bullet_surf) # Every bullet in flight, updated and drawn in batches
+        self.all_sprites.projectiles = self.projectiles
 
     def switch_music(self, track_name):
-        if self.current_music_track == track_name: # If the track is already playing
-            return 
-        self.current_music_track = track_name # Updating the current music track
-        if track_name in self.music_files and exists(self.music_files[track_name]): # If the track exists
-            try:
-                pygame.mixer.music.load(self.music_files[track_name]) # Loading the music file
-                pygame.mixer.music.set_volume(0.2) # Setting music volume
-                pygame.mixer.music.play(-1) # Playing the music on loop
-                if self.muted: pygame.mixer.music.pause() # Pausing music if muted
-            except: 
-                print(f"Error playing music: {track_name}") # Error handling for music playback
+        self.audio.play_music(track_name) # Crossfading once the preloaded track is ready [no file loading inside the frame]
 
     def toggle_mute(self):
         self.muted = not self.muted # Toggling mute state
-        vol = 0 if self.muted else 0.4 # Setting volume based on mute state
-        if self.audio['shoot']: 
-            self.audio['shoot'].set_volume(vol) # Adjusting shoot sound volume
-        if self.audio['impact']: 
-            self.audio['impact'].set_volume(vol) # Adjusting impact sound volume
-        if self.muted: pygame.mixer.music.pause() # Pausing music if muted
-        else: 
-            pygame.mixer.music.unpause() # Unpausing music if unmuted
+        self.audio.set_muted(self.muted) # Silencing sound effects and pausing music
 
-# Starting a new game by initializing all necessary components
-    def start_new_game(self):
-        self.all_sprites = CameraGroup() 
-        self.bullet_sprites = pygame.sprite.Group()
-        self.enemy_sprites = pygame.sprite.Group()
-        self.obstacle_sprites = pygame.sprite.Group()
-        self.border_sprites = pygame.sprite.Group()
-        
-        # Making these variables globally accessible
-        global all_sprites, bullet_sprites  
-        all_sprites = self.all_sprites
-        bullet_sprites = self.bullet_sprites
-        
-        # Loading the map
-        if exists(MAP_PATH):
-             self.tmx_data = pytmx.util_pygame.load_pygame(MAP_PATH) # Loading the Tiled map file
-        else:
-             print("ERROR: Map file not found!")
-             return
+    def apply_quality(self): # Passing the drawing settings of the active quality tier on [the simulation reads its tier from self.controls]
+        tier = self.governor.active
+        self.all_sprites.health_bars = tier['health_bars']
+        self.all_sprites.cull_margin = tier['cull_margin']
+
+    def build_world(self): # Parsing the map and creating the static world once per process [kept across restarts]
+        if not exists(MAP_PATH):
+            print("ERROR: Map file not found!")
+            return False
+        self.tmx_data = pytmx.util_pygame.load_pygame(MAP_PATH) # Loading the Tiled map file
 
         self.map_width = self.tmx_data.width * TILE_SIZE # Calculating map width in pixels
         self.map_height = self.tmx_data.height * TILE_SIZE # Calculating map height in pixels
         self.all_sprites.set_map_limits(self.map_width, self.map_height) # Setting map limits for camera group
 
-        for x, y, surf in self.tmx_data.get_layer_by_name('Ground').tiles(): # Iterating through all tiles in the 'Ground' layer
-            Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, self.all_sprites, LAYERS['ground'], shrink_hitbox=False) # Creating a Sprite for each ground tile
+        self.all_sprites.bake_ground(self.tmx_data.get_layer_by_name('Ground').tiles()) # Baking the 'Ground' layer into chunk surfaces [no sprite per tile]
         for obj in self.tmx_data.get_layer_by_name('Objects'): # Iterating through all objects in the 'Objects' layer
             obj_name = obj.name if obj.name else 'obstacle' # Default name if none provided
-            Sprite((obj.x, obj.y), obj.image, [self.all_sprites, self.obstacle_sprites], LAYERS['main'], obj_name=obj_name, shrink_hitbox=True) # Creating a Sprite for each object
+            Sprite((obj.x, obj.y), obj.image, self.all_sprites, LAYERS['main'], obj_name=obj_name) # Creating a Sprite for each object [drawing only, collision comes from the compiled rects]
         
         # Creating boundary trees around the map
-        if exists(TREE_PATH): 
-            tree_surf = pygame.image.load(TREE_PATH).convert_alpha() # Loading tree image
-            DENSITY = 40 # Distance between trees
-            for x in range(-TILE_SIZE * 5, self.map_width + TILE_SIZE * 5, DENSITY): # Placing trees along the top and bottom edges
-                for y in range(-TILE_SIZE * 5, TILE_SIZE, DENSITY): # Placing trees above the top edge
-                    Sprite((x, y), tree_surf, [self.all_sprites, self.border_sprites], LAYERS['main'], obj_name='border', shrink_hitbox=False) # Top edge
-                for y in range(self.map_height - TILE_SIZE, self.map_height + TILE_SIZE * 5, DENSITY): 
-                    Sprite((x, y), tree_surf, [self.all_sprites, self.border_sprites], LAYERS['main'], obj_name='border', shrink_hitbox=False) # Bottom edge
-            for y in range(0, self.map_height, DENSITY):
-                for x in range(-TILE_SIZE * 5, TILE_SIZE, DENSITY): 
-                    Sprite((x, y), tree_surf, [self.all_sprites, self.border_sprites], LAYERS['main'], obj_name='border', shrink_hitbox=False) # Left edge
-                for x in range(self.map_width - TILE_SIZE, self.map_width + TILE_SIZE * 5, DENSITY): # 
-                    Sprite((x, y), tree_surf, [self.all_sprites, self.border_sprites], LAYERS['main'], obj_name='border', shrink_hitbox=False) # Right edge
+        tree_surf = load_image(TREE_PATH) # Loading tree image
+        if tree_surf:
+            self.create_border(tree_surf)
+
+        collision_rects = load_collision_rects(self.tmx_data) # Merged object footprints, cached next to the map
+        for rect in collision_rects['objects']:
+            Collider(rect, self.collision_sprites, obj_name='collision')
+
+        # Building the static collision grids once [obstacles never move]
+        self.obstacle_grid = SpatialGrid(list(self.collision_sprites) + list(self.border_sprites)) # Everything the player collides with
+        self.enemy_obstacle_grid = SpatialGrid(self.collision_sprites) # Enemies ignore the border [they spawn outside the map] and are blocked by the same objects as the player
+        self.flow_field = FlowField(self.map_width, self.map_height, [s.hitbox for s in self.collision_sprites]) # Paths around the object footprints towards the player
+        return True
+
+# Starting a new game by resetting the player, enemies and wave state
+    def start_new_game(self, seed=None): # seed = seed of the random streams [a new one each game by default]
+        if self.tmx_data is None and not self.build_world(): # Building the static world on the first game only
+            return
+        if seed is None: 
+            seed = random.getrandbits(32)
+        self.rng.seed(seed)
+        self.sim_clock = GameClock()
+        self.stop_recording()
+        if self.record_dir: 
+            os.makedirs(self.record_dir, exist_ok=True)
+            self.recorder = InputRecorder(join(self.record_dir, time.strftime('%Y%m%d-%H%M%S') + '.rec'), seed) # Replay with: python replay.py <file>
+
+        # Removing the previous game's player, gun and enemies [static Sprite instances stay]
+        for sprite in self.all_sprites.sprites():
+            if not isinstance(sprite, Sprite):
+                sprite.kill()
+        self.projectiles.clear()
+        self.entities.reset()
+        self.broadphase.build([]) # Forgetting the previous game's enemies [the radar reads their positions]
+        self.boss = None
+        
+        # Making these variables globally accessible
+        global all_sprites, projectiles  
+        all_sprites = self.all_sprites
+        projectiles = self.projectiles
 
         for obj in self.tmx_data.get_layer_by_name('Entities'):
             if obj.name == 'Player':
-                self.player = Player((obj.x, obj.y), [self.all_sprites], self.obstacle_sprites, self.border_sprites, self.audio, self.all_sprites, self.bullet_sprites) # Creating the player instance
+                self.player = Player((obj.x, obj.y), [self.all_sprites, self.entities], self.obstacle_grid, self.audio, self.projectiles, self.clips['player'], self.controls, self.sim_clock) # Creating the player instance
 
         self.score = 0 # Initializing player score
         self.wave = 1 # Starting at wave 1
         self.mobs_killed = 0 # Resetting mobs killed counter
         self.enemies_remaining = 0 # Enemies remaining in the current wave
         self.enemies_to_spawn = 0 # Enemies left to spawn in the current wave
-        self.spawn_timer = 0 # Timer for enemy spawning
+        self.spawn_timer = -1000 # Timer for enemy spawning [a second before the clock starts, so the first enemy spawns as soon as wave 1 begins]
         self.wave_cooldown = 0 # Cooldown timer between waves
         self.in_wave = False  # Flag to indicate if currently in a wave
+        self.accumulator = 0 # Resetting unsimulated time
         self.state = 'COUNTDOWN' # Setting game state to countdown before wave starts
         self.countdown_start = pygame.time.get_ticks() # Recording the start time of the countdown
         self.start_new_wave() # Starting the first wave
+        self.wave_cooldown -= 3000 # The countdown already was the pause before the first wave [the game clock stands still during it]
+
+    def stop_recording(self):
+        if self.recorder: 
+            self.recorder.close()
+            self.recorder = None
+
+    def create_border(self, tree_surf): # Baking the border forest into row strips with four merged colliders
+        DENSITY = 40 # Distance between trees
+        tree_w, tree_h = tree_surf.get_size()
+        all_xs = range(-TILE_SIZE * 5, self.map_width + TILE_SIZE * 5, DENSITY) # Tree columns along the top and bottom edges
+        top_ys = range(-TILE_SIZE * 5, TILE_SIZE, DENSITY) # Tree rows above the top edge
+        bottom_ys = range(self.map_height - TILE_SIZE, self.map_height + TILE_SIZE * 5, DENSITY) # Tree rows below the bottom edge
+        side_ys = range(0, self.map_height, DENSITY) # Tree rows along the left and right edges
+        left_xs = range(-TILE_SIZE * 5, TILE_SIZE, DENSITY) # Tree columns left of the left edge
+        right_xs = range(self.map_width - TILE_SIZE, self.map_width + TILE_SIZE * 5, DENSITY) # Tree columns right of the right edge
+
+        strips = {} # Dictionary mapping tree count to a shared row surface [every row with the same count looks identical]
+        def get_strip(xs):
+            if len(xs) not in strips: 
+                strips[len(xs)] = make_strip(tree_surf, len(xs), DENSITY)
+            return strips[len(xs)]
+
+        # One sprite per tree row [trees in a row share the same y, so y-sorting stays the same]
+        for y in list(top_ys) + list(bottom_ys): 
+            Sprite((all_xs[0], y), get_strip(all_xs), self.all_sprites, LAYERS['main'], obj_name='border') # Top and bottom edges
+        for y in side_ys:
+            Sprite((left_xs[0], y), get_strip(left_xs), self.all_sprites, LAYERS['main'], obj_name='border') # Left edge
+            Sprite((right_xs[0], y), get_strip(right_xs), self.all_sprites, LAYERS['main'], obj_name='border') # Right edge
+
+        # One collider per edge [the trees overlap, so each edge blocks exactly this rectangle]
+        for xs, ys in [(all_xs, top_ys), (all_xs, bottom_ys), (left_xs, side_ys), (right_xs, side_ys)]:
+            Collider((xs[0], ys[0], xs[-1] - xs[0] + tree_w, ys[-1] - ys[0] + tree_h), self.border_sprites, obj_name='border')
 
     def start_new_wave(self):
-        self.wave_cooldown = pygame.time.get_ticks() # Recording the time when the new wave starts
+        self.wave_cooldown = self.sim_clock.ticks() # Recording the time when the new wave starts
         self.in_wave = False # Indicating that the wave has not yet started
         if self.wave % 5 == 0: 
             self.enemies_to_spawn = 1 # Boss wave
@@ -181,7 +271,7 @@ class Game:
 
     def spawn_logic(self):
         if self.enemies_to_spawn > 0:
-            current_time = pygame.time.get_ticks() # Getting the current time in milliseconds
+            current_time = self.sim_clock.ticks() # Getting the current game time in milliseconds
             if current_time - self.spawn_timer > 1000: 
                 self.spawn_timer = current_time; self.spawn_enemy() # Spawning an enemy every second
                 self.enemies_to_spawn -= 1 # Decreasing the count of enemies left to spawn
@@ -195,52 +285,105 @@ class Game:
                 options.append('blob') # Adding 'blob' enemy type from wave 2 onwards
             if self.wave >= 3: 
                 options.append('skeleton') # Adding 'skeleton' enemy type from wave 3 onwards
-            enemy_type = random.choice(options)
+            enemy_type = self.rng['spawn'].choice(options)
             if self.wave % 5 == 0: 
                 enemy_type = 'boss' # Forcing boss type on boss 5th waves 
         
         if pos: x, y = pos 
         else:
-            edge = random.choice(['top', 'bottom', 'left', 'right']) # Randomly choosing an edge to spawn the enemy
+            edge = self.rng['spawn'].choice(['top', 'bottom', 'left', 'right']) # Randomly choosing an edge to spawn the enemy
             if edge == 'top': 
-                x = random.randint(0, self.map_width) # Spawning above the top edge
+                x = self.rng['spawn'].randint(0, self.map_width) # Spawning above the top edge
                 y = -100 #100 pixels above the map
             elif edge == 'bottom': 
-                x = random.randint(0, self.map_width) # Spawning below the bottom edge
+                x = self.rng['spawn'].randint(0, self.map_width) # Spawning below the bottom edge
                 y = self.map_height + 100 #100 pixels below the map
             elif edge == 'left': 
                 x = -100 #100 pixels left of the map
-                y = random.randint(0, self.map_height) # Spawning left of the left edge
+                y = self.rng['spawn'].randint(0, self.map_height) # Spawning left of the left edge
             else: 
                 x = self.map_width + 100 #100 pixels right of the map
-                y = random.randint(0, self.map_height) # Spawning right of the right edge
-        Enemy((x, y), self.player, [self.all_sprites, self.enemy_sprites], self.obstacle_sprites, enemy_type, self.enemy_frames[enemy_type], game_ref=self) # Creating the enemy instance
-
-    def draw_enemy_indicator(self):
-        for enemy in self.enemy_sprites:
-            if getattr(enemy, 'is_dead', False): # Skipping dead enemies
-                continue
-            player_vec = pygame.math.Vector2(self.player.rect.center) # Getting the player's position vector
-            enemy_vec = pygame.math.Vector2(enemy.rect.center) # Getting the enemy's position vector
-            diff = enemy_vec - player_vec # Calculating the difference vector from player to enemy
-            if diff.length() > 0:
-                direction = diff.normalize()
-                base_size = 50 if enemy.enemy_name == 'boss' else 30 # Larger arrow for boss
-                color = 'purple' if enemy.enemy_name == 'boss' else 'red' # Different color for boss
-                scr_w, scr_h = self.display_surface.get_size() # Getting the current screen dimensions
-                center_screen = pygame.math.Vector2(scr_w//2, scr_h//2) # Center of the screen
-                arrow_center = center_screen + direction * 100 # Positioning the arrow 100 pixels from the center in the direction of the enemy
-                tip = arrow_center + direction * (base_size * 0.6) # Calculating the tip of the arrow
-                left_wing = arrow_center + direction.rotate(150) * (base_size * 0.5) # Calculating the left wing of the arrow
-                right_wing = arrow_center + direction.rotate(-150) * (base_size * 0.5) # Calculating the right wing of the arrow
-                pygame.draw.polygon(self.display_surface, color, [tip, left_wing, right_wing]) # Drawing the arrow on the display surface
+                y = self.rng['spawn'].randint(0, self.map_height) # Spawning right of the right edge
+        enemy = Enemy((x, y), self.player, [self.all_sprites, self.enemy_sprites, self.entities], self.enemy_obstacle_grid, enemy_type, self.clips[enemy_type], self.sim_clock, self.rng, game_ref=self) # Creating the enemy instance
+        if enemy_type == 'boss': 
+            self.boss = enemy
+
+    def update_game(self, dt): # One fixed simulation step of the GAME state
+        self.update_world(dt) # Moving sprites and running wave logic
+        self.check_collisions() # Resolving bullet and enemy hits
+        if not self.player.alive(): self.state = 'GAME_OVER' # Ending the game on player death
+        if self.recorder: 
+            self.recorder.record(self.controls, self) # Storing the input this step used [and the state hash at intervals]
+
+    def update_world(self, dt):
+        self.sim_clock.advance(dt)
+        self.player.can_attack = self.in_wave # Allowing player to attack only during waves
+        tier = QUALITY_TIERS[self.controls.quality] # Quality tier of this step [recorded, so replays use the same one]
+        self.entities.animation_interval = tier['animation_interval']
+        due = self.entities.due(self.all_sprites.view_rect(self.player.rect.center, self.controls.screen)) # Entities near the camera every step, distant enemies every few steps
+        self.flow_field.update(self.player.rect.center) # Rebuilt only when the player enters another cell
+        separate = self.entities.step % tier['separation_interval'] == 0 # Lower tiers push enemies apart every few steps
+        self.swarm.update([sprite for sprite, steps, animate in due if sprite in self.enemy_sprites], self.player.rect.center, self.flow_field, separate) # Steering the enemies that move this step
+        for sprite, steps, animate in due:
+            if animate: sprite.update(dt)
+            else: sprite.update(dt * steps, animate=False) # Catching up on skipped steps, animating later [off-screen or between animation steps]
+        self.projectiles.update(dt) # Moving and expiring all bullets at once
+        self.profiler.lap('update')
+        if not self.in_wave:
+            if self.sim_clock.ticks() - self.wave_cooldown > 3000: 
+                self.in_wave = True; self.player.heal(20)  # Starting the wave after cooldown and healing the player
+        else:
+            self.spawn_logic()
+            if self.enemies_to_spawn == 0 and len(self.enemy_sprites) == 0:
+                if self.wave == 5: 
+                    self.state = 'VICTORY' # Ending the game on victory after wave 5
+                else: self.wave += 1; self.start_new_wave() # Starting the next wave
+        self.profiler.lap('spawn')
+
+    def check_collisions(self):
+        self.broadphase.build(self.enemy_sprites) # Grid of the enemies after this step's movement
+        hits = self.projectiles.collide(self.broadphase) # Checking for bullet-enemy collisions along each bullet's path [bullets that hit are removed]
+        for enemy in hits:
+            if getattr(enemy, 'is_dead', False): 
+                continue # Skipping dead enemies
+            enemy.health -= 1 # Reducing enemy health
+            self.audio.play('impact') # Playing impact sound effect [throttled when many hits land at once]
+            
+            if enemy.health <= 0: # Enemy death logic
+                self.mobs_killed += 1 # Incrementing mobs killed counter
+                self.score += 500 if enemy.enemy_name == 'boss' else 10 # Updating score based on enemy type
+                enemy.trigger_death() # Triggering enemy death animation
+                
+                # Boss death logic
+                if enemy.enemy_name == 'boss':
+                    for mob in self.enemy_sprites: 
+                        if mob != enemy: 
+                            mob.kill() # Removing all other enemies
+                    self.state = 'VICTORY' # Ending the game on victory
+        self.profiler.lap('bullets')
+
+        for enemy in self.broadphase.overlapping(self.player.hitbox): # Checking for enemy-player collisions [only enemies near the player]
+            if enemy.alive() and not getattr(enemy, 'is_dead', False): # Skipping dead enemies and mobs removed by the boss's death
+                damage_val = 30 if enemy.enemy_name == 'boss' else 10 # Damage value based on enemy type
+                self.player.damage(damage_val) # Damaging the player
+        self.profiler.lap('enemy_hits')
+
+    def draw_enemy_indicator(self): # Threat radar over the enemy positions of the last step [cost bounded by the number of sectors]
+        rects = self.broadphase.rects # (left, top, right, bottom) of every enemy
+        boss = self.boss if self.boss and self.boss.alive() else None
+        if boss in self.broadphase.enemies: # The boss gets its own arrow instead of counting towards a sector
+            rects = np.delete(rects, self.broadphase.enemies.index(boss), axis=0)
+        centers = (rects[:, :2] + rects[:, 2:]) / 2
+        view = self.all_sprites.view_rect(self.player.rect.center, self.display_surface.get_size()) # World area on screen
+        boss_only = self.governor.active['indicators'] == 'boss' # Lower quality tiers only point at the boss
+        self.radar.draw(self.display_surface, centers, view, self.player.rect.center, boss, boss_only)
 
     def draw_button(self, text, rect, hover_color='white', normal_color='gray'): # Drawing a button with hover effect
         mouse_pos = pygame.mouse.get_pos() # Getting the current mouse position
         color = hover_color if rect.collidepoint(mouse_pos) else normal_color # Changing color on hover
         pygame.draw.rect(self.display_surface, color, rect, border_radius=12) # Drawing the button rectangle
         pygame.draw.rect(self.display_surface, 'white', rect, 2, border_radius=12) # Drawing the button border
-        txt_surf = self.ui_font.render(text, True, 'black' if color == hover_color else 'white') # Rendering the button text
+        txt_surf = self.text_cache.render(('button', text), self.ui_font, text, 'black' if color == hover_color else 'white') # Rendering the button text
         self.display_surface.blit(txt_surf, txt_surf.get_rect(center=rect.center)) # Drawing the text onto the button 
 
     def draw_ui_overlay(self):
@@ -250,15 +393,20 @@ class Game:
         self.draw_button("||", self.ui_pause_btn) # Drawing the pause button
         self.draw_button("M" if not self.muted else "U", self.ui_mute_btn) # Drawing the mute/unmute button
         fps = int(self.clock.get_fps()) # Getting the current frames per second
-        fps_txt = self.ui_font.render(f"FPS: {fps}", True, 'yellow') # Rendering the FPS text
+        scale = round(self.all_sprites.render_scale() * 100) # Render resolution in percent of the window
+        fps_label = f"FPS: {fps}  Quality: {self.governor.active['name']}"
+        if scale < 100: 
+            fps_label += f"  Render: {scale}%"
+        fps_txt = self.text_cache.render('fps', self.ui_font, fps_label, 'yellow') # Rendering the FPS text
         self.display_surface.blit(fps_txt, (10, h - 30)) # Drawing the FPS text on the screen
 
+    def title_scale(self):
+        return 1 + math.sin(pygame.time.get_ticks() * 0.005) * 0.05 # Calculating a scaling factor for the title animation
+
     def draw_menu(self):
         self.display_surface.fill('#223322') # Filling the background with a dark green color
         w, h = self.display_surface.get_size() # Getting the current screen dimensions
-        scale = 1 + math.sin(pygame.time.get_ticks() * 0.005) * 0.05 # Calculating a scaling factor for the title animation
-        title_surf = self.title_font.render("FOREST OF THE CRYSTAL KNIGHT", True, '#aaffaa') # Rendering the title text
-        title_surf = pygame.transform.rotozoom(title_surf, 0, scale) # Applying scaling to the title surface
+        title_surf = self.title_pulse.scaled(self.title_scale()) # Picking the pre-scaled title closest to the scaling factor
         self.display_surface.blit(title_surf, title_surf.get_rect(center=(w//2, h//2 - 150))) # Drawing the title on the screen
         
         cx, cy = w // 2, h // 2 # Center coordinates for buttons
@@ -268,10 +416,10 @@ class Game:
         self.draw_button("CONTROLS", self.instruct_btn, '#44ff44', '#228822') # Drawing the instructions button
 
     def draw_pause_menu(self):
+        self.all_sprites.custom_draw(self.player) # Drawing the frozen game world [the overlay is only drawn once over it]
         w, h = self.display_surface.get_size() # Getting the current screen dimensions
-        overlay = pygame.Surface((w, h), pygame.SRCALPHA); overlay.fill(UI_BG_COLOR) # Creating a semi-transparent overlay
-        self.display_surface.blit(overlay, (0,0)) # Drawing the overlay on the display surface
-        title = self.title_font.render("PAUSED", True, 'white') # Rendering the paused title text
+        self.display_surface.blit(self.overlay.get((w, h)), (0,0)) # Drawing the cached overlay on the display surface
+        title = self.text_cache.render('title', self.title_font, "PAUSED", 'white') # Rendering the paused title text
         self.display_surface.blit(title, title.get_rect(center=(w//2, h//2 - 150))) # Drawing the paused title on the screen
         cx, cy = w // 2, h // 2 # Center coordinates for buttons
         self.resume_btn.center = (cx, cy - 20) # Positioning the resume button
@@ -284,19 +432,18 @@ class Game:
     def draw_instructions(self):
         self.display_surface.fill('#222222') # Filling the background with a dark gray color
         w, h = self.display_surface.get_size() # Getting the current screen dimensions
-        title = self.title_font.render("HOW TO PLAY", True, 'white'); self.display_surface.blit(title, title.get_rect(center=(w//2, 100))) # Drawing the instructions title
-        lines = ["MOVE:  WASD / Arrows", "AIM:   Mouse", "SHOOT: Left Click", "PAUSE: ESC", "FPS:   F Key"] # Instructions text
+        title = self.text_cache.render('title', self.title_font, "HOW TO PLAY", 'white'); self.display_surface.blit(title, title.get_rect(center=(w//2, 100))) # Drawing the instructions title
+        lines = ["MOVE:  WASD / Arrows", "AIM:   Mouse", "SHOOT: Left Click", "PAUSE: ESC", "FPS:   F Key", "PROFILER: F3"] # Instructions text
         for i, line in enumerate(lines):
-            txt = self.font.render(line, True, 'white'); self.display_surface.blit(txt, txt.get_rect(center=(w//2, 250 + i * 60))) # Drawing each instruction line
+            txt = self.text_cache.render(('line', i), self.font, line, 'white'); self.display_surface.blit(txt, txt.get_rect(center=(w//2, 220 + i * 55))) # Drawing each instruction line
         self.back_btn.center = (w//2, h - 100) # Positioning the back button
         self.draw_button("BACK", self.back_btn) # Drawing the back button
 
     def draw_victory(self):
         self.all_sprites.custom_draw(self.player) # Drawing all sprites with the player as the focus
         w, h = self.display_surface.get_size() # Getting the current screen dimensions
-        overlay = pygame.Surface((w, h), pygame.SRCALPHA); overlay.fill(UI_BG_COLOR) # Creating a semi-transparent overlay
-        self.display_surface.blit(overlay, (0,0)) # Drawing the overlay on the display surface
-        title = self.title_font.render("VICTORY!", True, '#ffff00'); self.display_surface.blit(title, title.get_rect(center=(w//2, h//2 - 180))) # Drawing the victory title
+        self.display_surface.blit(self.overlay.get((w, h)), (0,0)) # Drawing the cached overlay on the display surface
+        title = self.text_cache.render('title', self.title_font, "VICTORY!", '#ffff00'); self.display_surface.blit(title, title.get_rect(center=(w//2, h//2 - 180))) # Drawing the victory title
         
         panel = pygame.Rect(0, 0, 400, 200) # Creating a panel rectangle for stats
         panel.center = (w//2, h//2 - 20) # Centering the panel
@@ -304,7 +451,7 @@ class Game:
         pygame.draw.rect(self.display_surface, 'white', panel, 3, border_radius=15) # Drawing the panel border
         stats = [f"Kills: {self.mobs_killed}", f"Score: {self.score}", "Rating: S"] # Victory stats
         for i, text in enumerate(stats):
-            t = self.font.render(text, True, 'white'); self.display_surface.blit(t, t.get_rect(center=(w//2, h//2 - 80 + i*50))) # Drawing each stat line
+            t = self.text_cache.render(('line', i), self.font, text, 'white'); self.display_surface.blit(t, t.get_rect(center=(w//2, h//2 - 80 + i*50))) # Drawing each stat line
 
         cx, cy = w // 2, h // 2 + 150 # Center coordinates for buttons
         self.end_play_btn.center = (cx - 120, cy) # Positioning the play again button
@@ -315,14 +462,12 @@ class Game:
     def draw_game_over(self):
         self.all_sprites.custom_draw(self.player) # Drawing all sprites with the player as the focus
         w, h = self.display_surface.get_size() # Getting the current screen dimensions
-        overlay = pygame.Surface((w, h), pygame.SRCALPHA) # Creating a semi-transparent overlay
-        overlay.fill(UI_BG_COLOR) # Filling the overlay with the UI background color
-        self.display_surface.blit(overlay, (0,0)) # Drawing the overlay on the display surface
-        title = self.title_font.render("GAME OVER", True, '#ff0000') # Rendering the game over title
+        self.display_surface.blit(self.overlay.get((w, h)), (0,0)) # Drawing the cached overlay on the display surface
+        title = self.text_cache.render('title', self.title_font, "GAME OVER", '#ff0000') # Rendering the game over title
         self.display_surface.blit(title, title.get_rect(center=(w//2, h//2 - 180))) # Drawing the game over title
         stats = [f"Wave: {self.wave}", f"Kills: {self.mobs_killed}", f"Score: {self.score}"] # Game over stats
         for i, text in enumerate(stats):
-            t = self.font.render(text, True, 'white') # Rendering each stat line
+            t = self.text_cache.render(('line', i), self.font, text, 'white') # Rendering each stat line
             self.display_surface.blit(t, t.get_rect(center=(w//2, h//2 - 50 + i*50))) # Drawing each stat line
         cx, cy = w // 2, h // 2 + 150 # Center coordinates for buttons
         self.end_play_btn.center = (cx - 120, cy) # Positioning the retry button
@@ -330,12 +475,58 @@ class Game:
         self.draw_button("RETRY", self.end_play_btn, '#00ff00', '#008800') # Drawing the retry button
         self.draw_button("MENU", self.end_menu_btn, '#ff0000', '#880000') # Drawing the main menu button
 
+    def get_events(self): # Returning this frame's events, sleeping on idle screens until something happens
+        if self.state in IDLE_STATES:
+            if self.idle_screen != (self.state, self.display_surface.get_size(), self.muted) or self.audio.pending: # Not sleeping before the new screen is drawn or a requested track has started
+                return pygame.event.get()
+            timeout = 1000 // IDLE_ANIMATION_FPS if self.state == 'MENU' else IDLE_WAKE_MS # Waking for the title animation, otherwise now and then for music crossfades
+            first = pygame.event.wait(timeout)
+            self.clock.tick() # Restarting frame timing so the sleep is not counted as a long frame
+            self.profiler.skip() # Not counting the sleep either
+            if first.type != pygame.NOEVENT: 
+                return [first] + pygame.event.get()
+        return pygame.event.get()
+
+    def idle_dirty_rect(self): # Returning the screen area that changed since the idle screen was last drawn, or None
+        size = self.display_surface.get_size()
+        screen = (self.state, size, self.muted)
+        mouse_pos = pygame.mouse.get_pos()
+        buttons = self.idle_buttons[self.state]
+        hover = next((i for i, rect in enumerate(buttons) if rect.collidepoint(mouse_pos)), None) # Button under the mouse
+        title = self.title_pulse.index(self.title_scale()) if self.state == 'MENU' else None # Menu title frame
+
+        if screen != self.idle_screen: # New screen, new window size or mute label changed
+            self.idle_screen, self.idle_hover, self.idle_title = screen, hover, title
+            return pygame.Rect((0, 0), size) 
+        rects = []
+        if hover != self.idle_hover: # Redrawing the button that lost hover and the one that gained it
+            rects += [buttons[i] for i in (self.idle_hover, hover) if i is not None]
+        if title != self.idle_title: 
+            rects.append(self.title_pulse.images[-1].get_rect(center=(size[0]//2, size[1]//2 - 150))) # Area of the largest title
+        self.idle_hover, self.idle_title = hover, title
+        if not rects: 
+            return None
+        return rects[0].unionall(rects[1:])
+
+    def draw_idle(self):
+        dirty = self.idle_dirty_rect()
+        if dirty is None: # Nothing changed, nothing to draw
+            return
+        screens = {'MENU': self.draw_menu, 'INSTRUCTIONS': self.draw_instructions, 'PAUSED': self.draw_pause_menu, 'GAME_OVER': self.draw_game_over, 'VICTORY': self.draw_victory}
+        self.display_surface.set_clip(dirty) # Limiting all drawing to the changed area
+        screens[self.state]()
+        self.display_surface.set_clip(None)
+        pygame.display.update(dirty) # Sending only the changed area to the window
+
     def run(self):
         while True:
             dt = self.clock.tick(self.target_fps) / 1000  # Delta time in seconds
+            self.profiler.skip() # Not counting the time clock.tick spent waiting
             current_time = pygame.time.get_ticks() # Current time in milliseconds
-            for event in pygame.event.get(): 
-                if event.type == pygame.QUIT: pygame.quit(); sys.exit() # Exiting the program
+            for event in self.get_events(): 
+                if event.type == pygame.QUIT: self.stop_recording(); pygame.quit(); sys.exit() # Exiting the program
+                if event.type == pygame.WINDOWEXPOSED: 
+                    self.idle_screen = None # Redrawing the whole idle screen after the window was covered
                 if event.type == pygame.VIDEORESIZE: 
                     self.all_sprites.set_map_limits(self.map_width, self.map_height) # Adjusting map limits on window resize
                 if event.type == pygame.KEYDOWN: # Handling keydown events
@@ -346,6 +537,8 @@ class Game:
                             self.state = 'GAME' # Resuming the game
                     if event.key == pygame.K_f: 
                         self.target_fps = 120 if self.target_fps == 60 else 60 # Toggling FPS between 60 and 120
+                    if event.key == pygame.K_F3: 
+                        self.show_profiler = not self.show_profiler # Toggling the frame profiler graph
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if self.state == 'GAME':
                         if self.ui_pause_btn.collidepoint(event.pos): 
@@ -373,11 +566,12 @@ class Game:
                 self.switch_music('menu') # Playing menu music
             else: 
                 self.switch_music('game') # Playing game music
+            self.audio.update() # Starting a requested track once its file has loaded
+            self.profiler.lap('events')
 
-            if self.state == 'MENU': 
-                self.draw_menu() # Drawing the main menu
-            elif self.state == 'INSTRUCTIONS': 
-                self.draw_instructions() # Drawing the instructions screen
+            idle = self.state in IDLE_STATES
+            if idle: 
+                self.draw_idle() # Drawing only what changed on menus and end screens
             elif self.state == 'COUNTDOWN':
                 self.all_sprites.custom_draw(self.player) # Drawing all sprites with the player as the focus
                 time_elapsed = current_time - self.countdown_start # Calculating elapsed time since countdown started
@@ -387,58 +581,33 @@ class Game:
                 elif time_elapsed < 3000: count_text = "1" # Displaying "1" for the third second
                 else: self.state = 'GAME'; count_text = "GO!" # Starting the game after countdown
                 scale = 1 + (time_elapsed % 1000) / 1000 * 0.5 # Scaling effect for countdown text
-                text_surf = self.title_font.render(count_text, True, 'yellow') # Rendering the countdown text
+                text_surf = self.text_cache.render('title', self.title_font, count_text, 'yellow') # Rendering the countdown text
                 self.display_surface.blit(text_surf, text_surf.get_rect(center=(w//2, h//2))) # Drawing the countdown text
                 self.draw_ui_overlay() # Drawing the UI overlay
-            elif self.state == 'PAUSED': 
-                self.draw_pause_menu() # Drawing the pause menu
             elif self.state == 'GAME':
-                self.player.can_attack = self.in_wave # Allowing player to attack only during waves
-                self.all_sprites.update(dt) # Updating all sprites with delta time
-                if not self.in_wave:
-                    if current_time - self.wave_cooldown > 3000: 
-                        self.in_wave = True; self.player.heal(20)  # Starting the wave after cooldown and healing the player
-                else:
-                    self.spawn_logic()
-                    if self.enemies_to_spawn == 0 and len(self.enemy_sprites) == 0:
-                        if self.wave == 5: 
-                            self.state = 'VICTORY' # Ending the game on victory after wave 5
-                        else: self.wave += 1; self.start_new_wave() # Starting the next wave
-
-                hits = pygame.sprite.groupcollide(self.enemy_sprites, self.bullet_sprites, False, True) # Checking for bullet-enemy collisions
-                for enemy in hits:
-                    if getattr(enemy, 'is_dead', False): 
-                        continue # Skipping dead enemies
-                    enemy.health -= 1 # Reducing enemy health
-                    if self.audio['impact']: self.audio['impact'].play() # Playing impact sound effect
-                    
-                    if enemy.health <= 0: # Enemy death logic
-                        self.mobs_killed += 1 # Incrementing mobs killed counter
-                        self.score += 500 if enemy.enemy_name == 'boss' else 10 # Updating score based on enemy type
-                        enemy.trigger_death() # Triggering enemy death animation
-                        
-                        # Boss death logic
-                        if enemy.enemy_name == 'boss':
-                            for mob in self.enemy_sprites: 
-                                if mob != enemy: 
-                                    mob.kill() # Removing all other enemies
-                            self.state = 'VICTORY' # Ending the game on victory
-
-                for enemy in self.enemy_sprites: # Checking for enemy-player collisions
-                    if not getattr(enemy, 'is_dead', False): # Skipping dead enemies
-                        if self.player.hitbox.colliderect(enemy.hitbox):
-                            damage_val = 30 if enemy.enemy_name == 'boss' else 10 # Damage value based on enemy type
-                            self.player.damage(damage_val) # Damaging the player
-
-                if not self.player.alive(): self.state = 'GAME_OVER' # Ending the game on player death
-
-                self.all_sprites.custom_draw(self.player) # Drawing all sprites with the player as the focus
+                self.accumulator += min(dt, MAX_SIM_STEPS / SIM_FPS) # Adding this frame's time to the simulation accumulator
+                steps = 0
+                while self.accumulator >= self.sim_dt and steps < MAX_SIM_STEPS: # Running as many fixed steps as the elapsed time allows
+                    self.all_sprites.save_positions() # Remembering where sprites were before the step [for interpolation]
+                    self.controls.capture() # Reading keyboard, mouse and window size for this step
+                    self.controls.quality = self.governor.tier
+                    self.update_game(self.sim_dt)
+                    self.accumulator -= self.sim_dt
+                    steps += 1
+                    if self.state != 'GAME': # Stopping early on game over or victory
+                        break
+                if steps == MAX_SIM_STEPS: 
+                    self.accumulator = min(self.accumulator, self.sim_dt) # Dropping time we could not catch up on [prevents a spiral of death]
+                alpha = self.accumulator / self.sim_dt # How far we are between the last step and the next one
+
+                self.all_sprites.custom_draw(self.player, alpha) # Drawing all sprites interpolated between simulation steps
                 self.draw_enemy_indicator() # Drawing enemy indicators
+                self.profiler.lap('indicators')
                 self.draw_ui_overlay() # Drawing the UI overlay
                  
                 w, h = self.display_surface.get_size() # Getting the current screen dimensions
                 # Rendering and displaying the player's score
-                score_surf = self.font.render(f'Score: {self.score}', True, 'white')
+                score_surf = self.text_cache.render('score', self.font, f'Score: {self.score}', 'white')
                 self.display_surface.blit(score_surf, (20, 20))
                 
                 # Drawing the player's health bar background (black rectangle)
@@ -450,26 +619,26 @@ class Game:
                 # Drawing the health bar border (white outline)
                 pygame.draw.rect(self.display_surface, 'white', (20, 60, 200, 20), 2)
                 # Rendering and displaying the "HP" label next to the health bar
-                hp_txt = self.ui_font.render("HP", True, 'white'); self.display_surface.blit(hp_txt, (20 + 200 + 10, 60))
+                hp_txt = self.text_cache.render('hp', self.ui_font, "HP", 'white'); self.display_surface.blit(hp_txt, (20 + 200 + 10, 60))
 
                 # Displaying wave information when not currently in a wave
                 if not self.in_wave:
                     # For boss waves (every 5th wave), display "BOSS WAVE" in purple
-                    if self.wave % 5 == 0: wave_text = self.title_font.render(f'BOSS WAVE', True, 'purple')
+                    if self.wave % 5 == 0: wave_text = self.text_cache.render('wave_banner', self.title_font, 'BOSS WAVE', 'purple')
                     # For regular waves, display "WAVE X STARTING..." in yellow
-                    else: wave_text = self.font.render(f'WAVE {self.wave} STARTING...', True, 'yellow')
+                    else: wave_text = self.text_cache.render('wave_banner', self.font, f'WAVE {self.wave} STARTING...', 'yellow')
                     # Drawing the wave text centered on screen
                     self.display_surface.blit(wave_text, wave_text.get_rect(center = (w//2, h//2 - 100)))
                 else:
                     # During a wave, display the current wave number (e.g., "Wave: 1/5")
-                    wave_surf = self.font.render(f'Wave: {self.wave}/5', True, 'white'); self.display_surface.blit(wave_surf, (w - 200, 60))
+                    wave_surf = self.text_cache.render('wave', self.font, f'Wave: {self.wave}/5', 'white'); self.display_surface.blit(wave_surf, (w - 200, 60))
                     # Calculating total remaining enemies (already spawned + still to spawn)
                     remaining = len(self.enemy_sprites) + self.enemies_to_spawn
                     # Displaying the remaining enemy count in red
-                    enemy_surf = self.font.render(f'Enemies: {remaining}', True, 'red'); self.display_surface.blit(enemy_surf, (w - 200, 100))
+                    enemy_surf = self.text_cache.render('enemies', self.font, f'Enemies: {remaining}', 'red'); self.display_surface.blit(enemy_surf, (w - 200, 100))
                 
                 # Finding if a boss is currently alive on the map
-                boss_alive = [e for e in self.enemy_sprites if e.enemy_name == 'boss' and not e.is_dead]
+                boss_alive = [self.boss] if self.boss and self.boss.alive() else [] # Killed bosses leave every group
                 # If a boss exists, display its health bar
                 if boss_alive:
                     boss = boss_alive[0]
@@ -482,14 +651,26 @@ class Game:
                     # Drawing the boss health bar border (white outline)
                     pygame.draw.rect(self.display_surface, 'white', (w//2 - 200, 50, 400, 30), 2)
                     # Rendering and displaying the "CRYSTAL KNIGHT" boss name above the health bar
-                    boss_txt = self.font.render("CRYSTAL KNIGHT", True, 'white'); self.display_surface.blit(boss_txt, boss_txt.get_rect(center=(w//2, 30)))
-
-            # Displaying the game over screen when the game state is 'GAME_OVER'
-            elif self.state == 'GAME_OVER': self.draw_game_over()
-            # Displaying the victory screen when the game state is 'VICTORY'
-            elif self.state == 'VICTORY': self.draw_victory()
-            pygame.display.update() # Updating the display
+                    boss_txt = self.text_cache.render('boss', self.font, "CRYSTAL KNIGHT", 'white'); self.display_surface.blit(boss_txt, boss_txt.get_rect(center=(w//2, 30)))
+                self.profiler.lap('hud')
+
+                if self.show_profiler: # Drawing the stacked frame time graph above the FPS counter
+                    self.profiler.draw(self.display_surface, (10, h - 40 - self.profiler.graph_size[1]), 1000 / self.target_fps)
+
+            if not idle: 
+                pygame.display.update() # Updating the display
+                self.idle_screen = None # Idle screens are fully redrawn the next time one is shown
+            self.profiler.lap('display')
+            self.profiler.end_frame() # Storing this frame's phase times
+            if not idle: 
+                self.all_sprites.render_level = self.resolution.update(1000 / self.target_fps) # Render resolution for the next frame
+                if self.governor.update(1000 / self.target_fps): 
+                    self.apply_quality()
 
 if __name__ == '__main__':
-    game = Game()
+    import argparse
+    parser = argparse.ArgumentParser(description='Forest of the Crystal Knight')
+    parser.add_argument('--record', metavar='DIR', help='save a recording of every game to this folder [replay with: python replay.py DIR/<file>.rec]')
+    args = parser.parse_args()
+    game = Game(record_dir=args.record)
     game.run()
\ No newline at end of file
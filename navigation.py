@@ -0,0 +1,92 @@
+import numpy as np
+from collections import deque
+from settings import *
+
+# Neighbor offsets (dx, dy) a flow arrow can point to [diagonals only when both sides are free]
+NEIGHBORS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+class FlowField: # Shared path towards the player: every free cell points at its neighbor closest to the target
+    def __init__(self, map_width, map_height, blockers, cell_size=NAV_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cols = -(-int(map_width) // cell_size) # Rounding up so the whole map is covered
+        self.rows = -(-int(map_height) // cell_size)
+        self.blocked = np.zeros((self.rows, self.cols), bool) # blocked[row, col] is True where a collision rect [plus clearance] overlaps the cell
+        for rect in blockers:
+            rect = rect.inflate(NAV_CLEARANCE * 2, NAV_CLEARANCE * 2) # Keeping paths away from the obstacles [enemy hitboxes are wider than a cell]
+            left, top = max(rect.left // cell_size, 0), max(rect.top // cell_size, 0)
+            right, bottom = min((rect.right - 1) // cell_size, self.cols - 1), min((rect.bottom - 1) // cell_size, self.rows - 1)
+            self.blocked[top:bottom + 1, left:right + 1] = True
+        self.neighbors = self.build_neighbors()
+        self.target_cell = None # Cell the field was last built for
+        self.distance = np.full((self.rows, self.cols), np.inf) # Steps from each cell to the target cell
+        self.waypoint = np.zeros((self.rows, self.cols, 2)) # Center of the next cell on the path, in world pixels
+        self.has_path = np.zeros((self.rows, self.cols), bool) # True where the waypoint leads somewhere useful
+
+    def cell_of(self, pos):
+        return int(pos[1] // self.cell_size), int(pos[0] // self.cell_size) # (row, col)
+
+    def update(self, target): # Rebuilding the field only when the target moves to another cell
+        cell = self.cell_of(target)
+        if cell == self.target_cell or not (0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols):
+            return
+        self.target_cell = cell
+        self.build_distance(cell)
+        self.build_waypoints()
+
+    def build_neighbors(self): # Free 4-connected neighbors of every cell as flat indices [built once, the blocked cells never change]
+        rows, cols = self.rows, self.cols
+        blocked = self.blocked.ravel().tolist() # Flat Python lists are faster than NumPy for single-element access
+        neighbors = []
+        for index in range(rows * cols):
+            row, col = divmod(index, cols)
+            candidates = ((index - cols, row > 0), (index + cols, row < rows - 1), (index - 1, col > 0), (index + 1, col < cols - 1))
+            neighbors.append([neighbor for neighbor, ok in candidates if ok and not blocked[neighbor]])
+        return neighbors
+
+    def build_distance(self, start): # Breadth-first search from the target over free cells [4-connected]
+        neighbors = self.neighbors
+        distance = [-1] * (self.rows * self.cols)
+        first = start[0] * self.cols + start[1]
+        distance[first] = 0
+        queue = deque([first])
+        while queue:
+            index = queue.popleft()
+            step = distance[index] + 1
+            for neighbor in neighbors[index]:
+                if distance[neighbor] < 0:
+                    distance[neighbor] = step
+                    queue.append(neighbor)
+        self.distance = np.array(distance, dtype=np.float64).reshape(self.rows, self.cols)
+        self.distance[self.distance < 0] = np.inf # Unreachable and blocked cells
+
+    def build_waypoints(self): # Pointing every cell at its neighbor with the lowest distance [blocked cells lead back out to a free one]
+        padded = np.pad(self.distance, 1, constant_values=np.inf) # Off-map neighbors are never chosen
+        best = self.distance.copy() # Lowest distance seen so far for each cell
+        step = np.zeros((self.rows, self.cols, 2), np.int64) # (dx, dy) of the chosen neighbor
+        for dx, dy in NEIGHBORS:
+            candidate = padded[1 + dy:1 + dy + self.rows, 1 + dx:1 + dx + self.cols]
+            if dx and dy: # No cutting past a blocked corner
+                side_x = padded[1:1 + self.rows, 1 + dx:1 + dx + self.cols]
+                side_y = padded[1 + dy:1 + dy + self.rows, 1:1 + self.cols]
+                candidate = np.where(np.isfinite(side_x) & np.isfinite(side_y), candidate, np.inf)
+            better = candidate < best
+            best = np.where(better, candidate, best)
+            step[better] = (dx, dy)
+        cols, rows = np.meshgrid(np.arange(self.cols), np.arange(self.rows))
+        self.waypoint[..., 0] = (cols + step[..., 0] + 0.5) * self.cell_size
+        self.waypoint[..., 1] = (rows + step[..., 1] + 0.5) * self.cell_size
+        self.has_path = np.isfinite(best) & (self.distance != 0) # The target cell itself heads straight for the target
+
+    def waypoints(self, points, target): # Point each position should head for: the next path cell, or the target where the field has no path
+        result = np.empty_like(points)
+        result[:] = target
+        if self.target_cell is None:
+            return result
+        rows = (points[:, 1] // self.cell_size).astype(np.int64)
+        cols = (points[:, 0] // self.cell_size).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols) # Enemies spawn outside the map
+        rows, cols = rows[inside], cols[inside]
+        use = np.zeros(len(points), bool)
+        use[inside] = self.has_path[rows, cols]
+        result[use] = self.waypoint[rows[use[inside]], cols[use[inside]]]
+        return result
@@ -0,0 +1,87 @@
+import pygame
+from time import perf_counter
+from collections import deque
+from settings import *
+
+# Phases of a GAME frame in drawing order, with the colour used in the graph
+PHASE_COLORS = {
+    'events': '#9e9e9e',
+    'update': '#4caf50',
+    'spawn': '#8bc34a',
+    'bullets': '#ff9800',
+    'enemy_hits': '#ff5722',
+    'ground': '#a1887f',
+    'main': '#2196f3',
+    'top': '#03a9f4',
+    'upscale': '#00bcd4',
+    'indicators': '#e91e63',
+    'hud': '#9c27b0',
+    'display': '#607d8b',
+}
+
+class FrameProfiler: # Collecting per-phase frame times into ring buffers
+    def __init__(self, history=PROFILER_HISTORY):
+        self.history = {name: deque([0.0] * history, maxlen=history) for name in PHASE_COLORS} # Dictionary mapping phase to its last frame times in milliseconds
+        self.current = dict.fromkeys(PHASE_COLORS, 0.0) # Times collected during the frame in progress
+        self.last_frame = dict(self.current) # Times of the last finished frame
+        self.lap_start = perf_counter() # Start of the phase being timed
+
+        # Graph
+        self.graph_size = (history * 2, 120) # Two pixels per frame
+        self.graph_ms = 1000 / 30 # Milliseconds shown by the full graph height
+        self.graph_surf = pygame.Surface(self.graph_size, pygame.SRCALPHA) # Scrolling graph [only the newest column is drawn each frame]
+        self.graph_surf.fill((0, 0, 0, 160)) # Semi-transparent background
+        self.font = pygame.font.SysFont("arial", 14, bold=True)
+        self.legend_surf = None # Cached legend, re-rendered every few frames
+        self.frame_count = 0
+
+    def skip(self): # Starting the next phase without recording the time since the last lap [e.g. after clock.tick sleeps]
+        self.lap_start = perf_counter()
+
+    def lap(self, name): # Adding the time since the last lap to a phase [phases hit several times per frame add up]
+        now = perf_counter()
+        self.current[name] += (now - self.lap_start) * 1000
+        self.lap_start = now
+
+    def end_frame(self): # Moving the finished frame into the ring buffers
+        for name, value in self.current.items():
+            self.history[name].append(value)
+            self.current[name] = 0.0
+        self.last_frame = {name: values[-1] for name, values in self.history.items()}
+        self.frame_count += 1
+
+    def average(self, name, frames=60): # Average time of a phase over the last frames, in milliseconds
+        values = self.history[name]
+        frames = min(frames, len(values))
+        return sum(values[i] for i in range(len(values) - frames, len(values))) / frames
+
+    def total(self, frames=60): # Average total frame time over the last frames, in milliseconds
+        return sum(self.average(name, frames) for name in self.history)
+
+    def update_graph(self):
+        width, height = self.graph_size
+        self.graph_surf.scroll(-2, 0) # Moving older columns left
+        self.graph_surf.fill((0, 0, 0, 160), (width - 2, 0, 2, height)) # Clearing the newest column
+        y = height
+        for name, value in self.last_frame.items(): # Stacking the phases from the bottom up
+            bar = int(value / self.graph_ms * height)
+            if bar > 0:
+                y -= bar
+                self.graph_surf.fill(PHASE_COLORS[name], (width - 2, max(y, 0), 2, bar))
+
+    def draw(self, surface, pos, budget_ms):
+        self.update_graph()
+        x, y = pos
+        width, height = self.graph_size
+        surface.blit(self.graph_surf, pos)
+        budget_y = y + height - int(budget_ms / self.graph_ms * height) # Frame budget line [1000 / target fps]
+        pygame.draw.line(surface, 'white', (x, budget_y), (x + width, budget_y))
+
+        if self.legend_surf is None or self.frame_count % 15 == 0: # Re-rendering the text only a few times per second
+            lines = [f"frame {self.total():5.2f} ms"] + [f"{name} {self.average(name):5.2f}" for name in PHASE_COLORS]
+            self.legend_surf = pygame.Surface((130, len(lines) * 16), pygame.SRCALPHA)
+            self.legend_surf.fill((0, 0, 0, 160))
+            for i, line in enumerate(lines):
+                color = PHASE_COLORS.get(line.split()[0], 'white')
+                self.legend_surf.blit(self.font.render(line, True, color), (4, i * 16))
+        surface.blit(self.legend_surf, (x + width + 4, y + height - self.legend_surf.get_height()))
@@ -0,0 +1,80 @@
+import numpy as np
+from settings import *
+
+class ProjectilePool: # Every live projectile stored in preallocated arrays instead of one sprite per shot
+    def __init__(self, image, capacity=PROJECTILE_CAPACITY):
+        self.image = image # Shared image drawn for every projectile
+        self.half_size = np.array(image.get_size(), dtype=np.float64) / 2
+        self.count = 0 # Live projectiles are always packed into the first count slots
+        self.allocate(capacity)
+
+    def allocate(self, capacity): # Creating the arrays [copying the live projectiles when growing]
+        old = self.count and (self.pos, self.prev, self.vel, self.origin, self.range_sq, self.expired) # Live data to keep
+        self.pos = np.zeros((capacity, 2)) # Current centers
+        self.prev = np.zeros((capacity, 2)) # Centers before the last step [for interpolated drawing]
+        self.vel = np.zeros((capacity, 2)) # Velocities in pixels per second
+        self.origin = np.zeros((capacity, 2)) # Spawn positions
+        self.range_sq = np.zeros(capacity) # Squared travel distance before expiring
+        self.expired = np.zeros(capacity, bool) # Reached their range during the last step [removed after the collision pass]
+        if old:
+            for new_array, old_array in zip((self.pos, self.prev, self.vel, self.origin, self.range_sq, self.expired), old):
+                new_array[:self.count] = old_array[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, pos, direction, speed=BULLET_SPEED, max_range=BULLET_RANGE):
+        if self.count == len(self.pos): # Doubling the arrays when full [rare, keeps the slots preallocated]
+            self.allocate(len(self.pos) * 2)
+        i = self.count
+        self.pos[i] = self.prev[i] = self.origin[i] = pos
+        self.vel[i] = (direction[0] * speed, direction[1] * speed)
+        self.range_sq[i] = max_range * max_range
+        self.expired[i] = False
+        self.count += 1
+
+    def remove(self, keep): # Packing the projectiles where keep is True into the first slots [keep is a mask over the live slots]
+        n = int(keep.sum())
+        if n == self.count:
+            return
+        for array in (self.pos, self.prev, self.vel, self.origin, self.range_sq, self.expired):
+            array[:n] = array[:self.count][keep]
+        self.count = n
+
+    def update(self, dt): # Moving every projectile, stopping those that reach their range at the range's end
+        self.remove(~self.expired[:self.count]) # Projectiles that expired last step [when collide was not called]
+        n = self.count
+        if not n:
+            return
+        self.prev[:n] = self.pos[:n] # The step's start, used for swept collision and interpolated drawing
+        self.pos[:n] += self.vel[:n] * dt
+        travelled = self.pos[:n] - self.origin[:n]
+        travelled_sq = (travelled * travelled).sum(axis=1) # Squared distance [no square root]
+        expired = travelled_sq > self.range_sq[:n]
+        if expired.any(): # Clamping the last step to the range so it still collides up to there
+            scale = np.sqrt(self.range_sq[:n][expired] / travelled_sq[expired])
+            self.pos[:n][expired] = self.origin[:n][expired] + travelled[expired] * scale[:, None]
+        self.expired[:n] = expired
+
+    def collide(self, broadphase): # Returning the enemies hit during the last step and removing the projectiles that hit them or expired
+        n = self.count
+        if not n:
+            return []
+        hits, enemies = broadphase.sweep(self.prev[:n], self.pos[:n], self.half_size) # Each projectile stops at the first enemy on its path [no tunnelling]
+        keep = ~self.expired[:n] # Expired projectiles go after this pass, like the ones that hit
+        keep[hits] = False
+        self.remove(keep)
+        return [broadphase.enemies[i] for i in np.unique(enemies)]
+
+    def draw(self, surface, offset, alpha=1, scale=1, image=None): # Drawing every on-screen projectile in one batched blit [image = self.image at the render scale]
+        n = self.count
+        if not n:
+            return
+        image = image if image is not None else self.image
+        pos = (self.prev[:n] + (self.pos[:n] - self.prev[:n]) * alpha - self.half_size - (offset.x, offset.y)) * scale # Blended top-left on the surface
+        w, h = surface.get_size()
+        visible = pos[(pos[:, 0] > -image.get_width()) & (pos[:, 0] < w) & (pos[:, 1] > -image.get_height()) & (pos[:, 1] < h)]
+        surface.blits([(image, topleft) for topleft in visible.astype(int).tolist()], doreturn=False)
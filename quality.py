@@ -0,0 +1,36 @@
+from settings import *
+
+class QualityGovernor: # Stepping through QUALITY_TIERS from recent frame times, with hysteresis so tiers do not flip back and forth
+    def __init__(self, profiler, tiers=QUALITY_TIERS):
+        self.profiler = profiler # FrameProfiler supplying the measured frame times
+        self.tiers = tiers
+        self.tier = 0 # Index of the active tier [0 = best]
+        self.active = tiers[0] # Dictionary of the active tier's settings
+        self.over = 0 # Consecutive frames above the budget
+        self.under = 0 # Consecutive frames with headroom
+        self.up_frames = QUALITY_UP_FRAMES # Frames of headroom needed before raising the tier
+        self.since_raise = None # Frames since the tier was last raised [None = not raised yet]
+
+    def update(self, budget_ms): # Called once per frame, returning True when the tier changed
+        frame_ms = self.profiler.total(QUALITY_WINDOW)
+        if self.since_raise is not None: 
+            self.since_raise += 1
+        if frame_ms > budget_ms * QUALITY_HIGH:
+            self.over += 1; self.under = 0
+        elif frame_ms < budget_ms * QUALITY_LOW:
+            self.under += 1; self.over = 0
+        else: # Between the two thresholds nothing changes
+            self.over = self.under = 0
+
+        if self.over >= QUALITY_DOWN_FRAMES and self.tier < len(self.tiers) - 1:
+            if self.since_raise is not None and self.since_raise < self.up_frames: # The last raise did not hold: waiting longer before the next one
+                self.up_frames = min(self.up_frames * 2, QUALITY_UP_FRAMES_MAX)
+            self.tier += 1
+        elif self.under >= self.up_frames and self.tier > 0:
+            self.tier -= 1
+            self.since_raise = 0
+        else:
+            return False
+        self.over = self.under = 0
+        self.active = self.tiers[self.tier]
+        return True
@@ -0,0 +1,50 @@
+import math
+import numpy as np
+import pygame
+from settings import *
+
+class ThreatRadar: # Off-screen enemies binned into angular sectors around the player, one arrow per occupied sector
+    def __init__(self, sectors=RADAR_SECTORS, radius=RADAR_RADIUS):
+        self.sectors = sectors
+        self.radius = radius # Distance of the arrows from the screen center
+        angles = (np.arange(sectors) + 0.5) * (2 * math.pi / sectors) - math.pi # Middle angle of each sector [sector 0 starts at -pi like atan2]
+        self.directions = np.stack((np.cos(angles), np.sin(angles)), axis=1).tolist()
+        self.angles = angles.tolist()
+        self.arrows = {} # Dictionary mapping (sector, size, color) to a rotated arrow surface [built the first time it is drawn]
+
+    def arrow(self, sector, size, color): # Arrow pointing into a sector, drawn and rotated once
+        key = (sector, size, color)
+        if key not in self.arrows:
+            side = math.ceil(size * 1.2) # Room for the tip [0.6 * size] on either side of the center
+            surf = pygame.Surface((side, side), pygame.SRCALPHA)
+            c = side / 2
+            points = [(c + size * 0.6, c), (c - size * 0.433, c - size * 0.25), (c - size * 0.433, c + size * 0.25)] # Tip and wings at +-150 degrees, pointing right
+            pygame.draw.polygon(surf, color, points)
+            self.arrows[key] = pygame.transform.rotate(surf, -math.degrees(self.angles[sector])) # Rotating counterclockwise on screen [y points down]
+        return self.arrows[key]
+
+    def sector_of(self, diff): # Sector index of each (dx, dy) row
+        angle = np.arctan2(diff[:, 1], diff[:, 0])
+        return np.floor((angle + math.pi) / (2 * math.pi) * self.sectors).astype(np.int64) % self.sectors
+
+    def draw(self, surface, centers, view, origin, boss=None, boss_only=False): # centers = world positions of the enemies, view = world area on screen
+        screen_center = surface.get_rect().center
+        if len(centers) and not boss_only:
+            offscreen = (centers[:, 0] < view.left) | (centers[:, 0] >= view.right) | (centers[:, 1] < view.top) | (centers[:, 1] >= view.bottom)
+            diff = centers[offscreen] - origin
+            sector = self.sector_of(diff)
+            counts = np.bincount(sector, minlength=self.sectors) # Enemies per sector
+            nearest = np.full(self.sectors, np.inf) # Distance of the closest enemy per sector
+            np.minimum.at(nearest, sector, np.hypot(diff[:, 0], diff[:, 1]))
+            for s in np.flatnonzero(counts).tolist(): # Bounded by the number of sectors, not enemies
+                size = next(size for threshold, size in reversed(RADAR_COUNT_SIZES) if counts[s] >= threshold) # Bigger arrow for more enemies
+                color = next(color for distance, color in RADAR_THREAT_COLORS if nearest[s] < distance) # Brighter arrow for closer enemies
+                self.blit_arrow(surface, screen_center, s, size, color)
+        if boss and not view.collidepoint(boss.rect.center): # Boss arrow on top, in its own colour
+            s = int(self.sector_of(np.array([boss.rect.center], dtype=np.float64) - origin)[0])
+            self.blit_arrow(surface, screen_center, s, RADAR_BOSS_SIZE, RADAR_BOSS_COLOR)
+
+    def blit_arrow(self, surface, screen_center, sector, size, color):
+        image = self.arrow(sector, size, color)
+        dx, dy = self.directions[sector]
+        surface.blit(image, image.get_rect(center=(screen_center[0] + dx * self.radius, screen_center[1] + dy * self.radius)))
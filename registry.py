@@ -0,0 +1,37 @@
+import pygame
+from settings import *
+
+class UpdateRegistry(pygame.sprite.Group): # Entities that need updating [the static world is never added], with reduced rates for distant ones
+    def __init__(self, interval=LOD_FAR_INTERVAL, margin=LOD_NEAR_MARGIN):
+        super().__init__()
+        self.interval = interval # Steps between updates of a distant entity
+        self.margin = margin # Pixels around the camera view where entities still update every step
+        self.step = 0
+        self.slots = {} # Dictionary mapping each entity to the step within the interval it updates on [spreads the load]
+        self.next_slot = 0
+        self.animation_interval = 1 # Steps between animation updates of entities near the camera [set from the quality tier]
+
+    def reset(self): # Restarting the update schedule [a new game spreads its entities the same way every time]
+        self.step = 0
+        self.next_slot = 0
+
+    def add_internal(self, sprite, layer=None): # Called by pygame whenever a sprite joins this group
+        super().add_internal(sprite, layer)
+        self.slots[sprite] = self.next_slot
+        self.next_slot = (self.next_slot + 1) % self.interval
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.slots.pop(sprite, None)
+
+    def due(self, view): # Entities to update this step, as (sprite, steps, animate) where steps is how many steps of time it catches up
+        self.step += 1
+        near = view.inflate(self.margin * 2, self.margin * 2)
+        result = []
+        for sprite in self.sprites():
+            lod = getattr(sprite, 'lod', False)
+            if not lod or sprite.rect.colliderect(near): # Full rate near the camera and for entities without LOD
+                result.append((sprite, 1, not lod or (self.step + self.slots[sprite]) % self.animation_interval == 0))
+            elif (self.step + self.slots[sprite]) % self.interval == 0:
+                result.append((sprite, self.interval, False))
+        return result
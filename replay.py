@@ -0,0 +1,158 @@
+import os
+import sys
+import zlib
+import struct
+import random
+import pygame
+from settings import *
+
+# Keys the simulation reads, one bit each in a recorded step
+RECORDED_KEYS = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d]
+KEY_BITS = {key: 1 << i for i, key in enumerate(RECORDED_KEYS)}
+
+# Recording file layout: header, then one STEP per simulation step, with a HASH after every hash interval-th step
+MAGIC = b'FCKR'
+VERSION = 2
+HEADER = struct.Struct('<4sBIH') # magic, version, seed, hash interval
+STEP = struct.Struct('<BBBhhHH') # key bits, mouse buttons, quality tier, mouse x, mouse y, window width, window height [11 bytes]
+HASH = struct.Struct('<I') # State hash after the step
+
+class GameClock: # Simulated time in milliseconds, advanced by the fixed step [game timers ignore pauses and replay speed]
+    def __init__(self):
+        self.time = 0.0
+
+    def advance(self, dt):
+        self.time += dt * 1000
+
+    def ticks(self): # Drop-in for pygame.time.get_ticks() inside the simulation
+        return int(self.time)
+
+class RandomStreams: # One random.Random per subsystem, all derived from one seed [extra draws in one subsystem do not shift the others]
+    def __init__(self, seed=RNG_SEED):
+        self.seed(seed)
+
+    def seed(self, seed):
+        self.base = seed # Seed the whole game was started with [stored in recordings]
+        self.streams = {} # Dictionary mapping a subsystem name to its generator
+
+    def __getitem__(self, name):
+        if name not in self.streams:
+            self.streams[name] = random.Random(f'{self.base}:{name}') # String seeds hash the same on every run and platform
+        return self.streams[name]
+
+class InputState: # Everything the simulation reads from the keyboard, mouse and window during one step
+    def __init__(self):
+        self.keys = 0 # Bits of RECORDED_KEYS held down
+        self.buttons = 0 # Bit 0 = left, 1 = middle, 2 = right mouse button
+        self.mouse_pos = (0, 0)
+        self.screen = (WINDOW_WIDTH, WINDOW_HEIGHT) # Window size [the aim is relative to the camera]
+        self.quality = 0 # Index of the quality tier the step ran at [chosen from real frame times, so it is recorded like input]
+
+    def capture(self): # Reading the live devices
+        pressed = pygame.key.get_pressed()
+        self.keys = sum(bit for key, bit in KEY_BITS.items() if pressed[key])
+        self.buttons = sum(1 << i for i, down in enumerate(pygame.mouse.get_pressed()) if down)
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.screen = pygame.display.get_surface().get_size()
+
+    def pressed(self, key):
+        return bool(self.keys & KEY_BITS[key])
+
+    def button(self, index):
+        return bool(self.buttons & (1 << index))
+
+    def pack(self):
+        return STEP.pack(self.keys, self.buttons, self.quality, *self.mouse_pos, *self.screen)
+
+    def unpack(self, data):
+        self.keys, self.buttons, self.quality, x, y, w, h = STEP.unpack(data)
+        self.mouse_pos, self.screen = (x, y), (w, h)
+
+def state_hash(game): # CRC32 of the simulation state that matters for a desync [player, wave, enemies, projectiles]
+    player = game.player
+    data = [struct.pack('<4i5i', *player.hitbox, player.health, game.score, game.wave, game.enemies_to_spawn, game.in_wave)]
+    for enemy in game.enemy_sprites: # Insertion order, the same on every run
+        data.append(struct.pack('<5i', *enemy.hitbox, enemy.health))
+    data.append(game.projectiles.pos[:game.projectiles.count].tobytes())
+    return zlib.crc32(b''.join(data))
+
+class InputRecorder: # Writing the input of every simulation step of one game, with a state hash at intervals
+    def __init__(self, path, seed, interval=REPLAY_HASH_INTERVAL):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, interval))
+        self.interval = interval
+        self.steps = 0
+
+    def record(self, controls, game): # Called after each step with the input it used
+        self.file.write(controls.pack())
+        self.steps += 1
+        if self.steps % self.interval == 0:
+            self.file.write(HASH.pack(state_hash(game)))
+
+    def close(self):
+        self.file.close()
+
+class InputPlayer: # Reading a recording back one step at a time
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.data = file.read()
+        magic, version, self.seed, self.interval = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+
+    def steps(self, controls): # Loading each step's input into controls, yielding the expected state hash after it [or None]
+        offset, steps = HEADER.size, 0
+        while offset + STEP.size <= len(self.data):
+            controls.unpack(self.data[offset:offset + STEP.size])
+            offset += STEP.size
+            steps += 1
+            expected = None
+            if steps % self.interval == 0 and offset + HASH.size <= len(self.data):
+                expected, = HASH.unpack_from(self.data, offset)
+                offset += HASH.size
+            yield expected
+
+def replay(game, path, draw=False): # Re-running a recording as fast as possible, returning (steps, step of the first desync or None)
+    recording = InputPlayer(path)
+    game.start_new_game(seed=recording.seed)
+    game.state = 'GAME' # Skipping the countdown [it is not simulated]
+    steps = 0
+    for expected in recording.steps(game.controls): # The player reads game.controls
+        game.all_sprites.save_positions()
+        game.update_game(game.sim_dt)
+        steps += 1
+        if draw:
+            game.all_sprites.custom_draw(game.player) # Also rendering, to reproduce drawing stutters
+        game.profiler.end_frame()
+        if expected is not None and state_hash(game) != expected:
+            return steps, steps
+    return steps, None
+
+if __name__ == '__main__':
+    import argparse
+    from time import perf_counter
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # Running without a window
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from main import Game
+
+    parser = argparse.ArgumentParser(description='Headless replay of a recorded game [recorded with: python main.py --record DIR]')
+    parser.add_argument('recording')
+    parser.add_argument('--draw', action='store_true', help='render every step too')
+    parser.add_argument('--profile', action='store_true', help='run under cProfile and print the slowest functions')
+    args = parser.parse_args()
+
+    game = Game()
+    start = perf_counter()
+    if args.profile:
+        import cProfile, pstats
+        profile = cProfile.Profile()
+        steps, desync = profile.runcall(replay, game, args.recording, args.draw)
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(25)
+    else:
+        steps, desync = replay(game, args.recording, args.draw)
+    elapsed = perf_counter() - start
+    print(f"Replayed {steps} steps ({steps / SIM_FPS:.1f} s of game time) in {elapsed:.2f} s")
+    if desync is not None:
+        print(f"DESYNC: state hash differs after step {desync}")
+        sys.exit(1)
+    print("State hashes match")
@@ -0,0 +1,27 @@
+import math
+from settings import *
+
+WORLD_PHASES = ['ground', 'main', 'top'] # Profiler phases whose cost shrinks with the render resolution
+
+def max_scale(window_size, max_pixels=RENDER_MAX_PIXELS): # Largest render scale that keeps the world within the pixel budget
+    pixels = window_size[0] * window_size[1]
+    return min(1, math.sqrt(max_pixels / pixels)) if pixels else 1
+
+class ResolutionScaler: # Lowering the world render resolution while frames run over budget, raising it again when there is headroom
+    def __init__(self, profiler, min_level=RENDER_SCALE_MIN, step=RENDER_SCALE_STEP):
+        self.profiler = profiler # FrameProfiler supplying the measured frame times
+        self.min_level = min_level
+        self.step = step
+        self.level = 1 # Fraction of the largest render scale [max_scale] currently used
+        self.frames = 0 # Frames since the level last changed
+
+    def update(self, budget_ms): # Called once per frame, returning the render level for the next frame
+        self.frames += 1
+        if self.frames >= RENDER_SCALE_SETTLE: # Waiting until the average only covers frames drawn at the current level
+            frame_ms = self.profiler.total(RENDER_SCALE_SETTLE)
+            world_ms = sum(self.profiler.average(name, RENDER_SCALE_SETTLE) for name in WORLD_PHASES)
+            if frame_ms > budget_ms * RENDER_SCALE_HIGH and world_ms > frame_ms * RENDER_SCALE_WORLD_SHARE and self.level > self.min_level: # Only when drawing the world is a large part of the frame
+                self.level = max(self.min_level, self.level - self.step); self.frames = 0
+            elif frame_ms < budget_ms * RENDER_SCALE_LOW and self.level < 1:
+                self.level = min(1, self.level + self.step); self.frames = 0
+        return self.level
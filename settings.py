@@ -5,7 +5,16 @@ from os.path import join
 # WINDOW SETTINGS
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
 FPS = 60
+SIM_FPS = 60 # Fixed simulation steps per second [independent of the render frame rate]
+MAX_SIM_STEPS = 5 # Most simulation steps run in one frame before the remaining time is dropped
+PROFILER_HISTORY = 240 # Number of frames kept by the frame profiler
+IDLE_STATES = ['MENU', 'INSTRUCTIONS', 'PAUSED', 'GAME_OVER', 'VICTORY'] # Screens that only redraw when something changes
+IDLE_ANIMATION_FPS = 30 # Wake-up rate for animations on idle screens [menu title]
+IDLE_WAKE_MS = 250 # Longest sleep on the other idle screens without input
 TILE_SIZE = 64 # Size of each tile in the game world [64x64 pixels]
+ROTATION_STEP = 2 # Angle step in degrees between pre-rotated images [smaller = smoother, more memory]
+CHUNK_SIZE = 8 # Number of tiles per side in each pre-baked ground chunk [8x8 tiles = 512x512 pixels]
+GRID_CELL_SIZE = 128 # Size of each cell in the collision spatial grid [128x128 pixels]
 
 # LAYERS
 LAYERS = {
@@ -27,4 +36,68 @@ ENEMY_PATH = join(ASSETS_DIR, 'images', 'enemies')
 GUN_PATH = join(ASSETS_DIR, 'images', 'gun')
 MAP_PATH = join(ASSETS_DIR, 'data', 'maps', 'world.tmx') # Blueprint for the game map, only contains data [Coordinates, object placements]
 TREE_PATH = join(ASSETS_DIR, 'data', 'graphics', 'objects', 'green_tree.png') # For game boundary 
-AUDIO_PATH = join(ASSETS_DIR, 'audio')
\ No newline at end of file
+AUDIO_PATH = join(ASSETS_DIR, 'audio')
+COLLISION_CACHE_PATH = join(ASSETS_DIR, 'data', 'maps', 'world.collisions.json') # Generated by collision_map.py [merged collision rects of world.tmx]
+ATLAS_DIR = join(ASSETS_DIR, 'atlas') # Generated by atlas.py [packed images, rebuilt with: python atlas.py]
+ATLAS_INDEX = join(ATLAS_DIR, 'index.json') # Position of every packed image in the atlas pages
+ATLAS_PAGE_SIZE = 2048 # Largest width and height of an atlas page
+
+# PROJECTILES
+PROJECTILE_CAPACITY = 256 # Slots preallocated in the projectile pool [doubles when full]
+BULLET_SPEED = 1000 # Pixels per second
+BULLET_RANGE = 750 # Pixels travelled before a bullet expires
+
+# SWARM
+SEPARATION_RADIUS = 30 # Enemies closer than this push each other apart
+SEPARATION_WEIGHT = 0.8 # Strength of the push from one close enemy
+
+# NAVIGATION
+NAV_CELL_SIZE = TILE_SIZE # Size of each flow field cell in pixels
+NAV_CLEARANCE = 16 # Pixels around each collision rect that paths avoid
+
+# SIMULATION LEVEL OF DETAIL
+LOD_FAR_INTERVAL = 4 # Distant enemies update once every this many steps
+LOD_NEAR_MARGIN = 300 # Pixels around the camera view where enemies update every step
+
+# AUDIO
+SOUND_CHANNELS = {'player': 2, 'impact': 4} # Mixer channels reserved for each sound category
+SOUND_THROTTLE_MS = 50 # Window in which starts of the same sound are counted
+SOUND_MAX_PER_WINDOW = 2 # Starts of the same sound allowed per window
+SFX_VOLUME = 0.4
+MUSIC_VOLUME = 0.2
+MUSIC_FADE_MS = 800 # Crossfade length between music tracks
+
+# RENDER SCALE
+RENDER_MAX_PIXELS = 1920 * 1080 # Most pixels the world is drawn at [larger windows show the same world area, upscaled]
+RENDER_SCALE_MIN = 0.5 # Lowest render level, as a fraction of the largest render resolution
+RENDER_SCALE_STEP = 0.125 # Change of the render resolution per adjustment
+RENDER_SCALE_HIGH = 0.9 # Lowering the resolution when the average frame takes more than this share of the budget
+RENDER_SCALE_LOW = 0.6 # Raising it again when the average frame takes less than this share
+RENDER_SCALE_WORLD_SHARE = 0.3 # Lowering only while drawing the world takes more than this share of the frame [the upscale itself does not shrink]
+RENDER_SCALE_SETTLE = 60 # Frames averaged before each adjustment
+
+# QUALITY TIERS [from best to cheapest, chosen by QualityGovernor]
+QUALITY_TIERS = [
+    {'name': 'high', 'health_bars': True, 'indicators': 'all', 'separation_interval': 1, 'animation_interval': 1, 'cull_margin': 100},
+    {'name': 'medium', 'health_bars': True, 'indicators': 'all', 'separation_interval': 2, 'animation_interval': 2, 'cull_margin': 64},
+    {'name': 'low', 'health_bars': False, 'indicators': 'boss', 'separation_interval': 3, 'animation_interval': 3, 'cull_margin': 32},
+    {'name': 'minimum', 'health_bars': False, 'indicators': 'boss', 'separation_interval': 4, 'animation_interval': 4, 'cull_margin': 16},
+]
+QUALITY_WINDOW = 30 # Frames averaged for each decision
+QUALITY_HIGH = 0.95 # Dropping a tier when the average frame stays above this share of the budget...
+QUALITY_DOWN_FRAMES = 30 # ...for this many frames
+QUALITY_LOW = 0.6 # Raising a tier when it stays below this share...
+QUALITY_UP_FRAMES = 180 # ...for this many frames [doubled after each raise that had to be undone, up to QUALITY_UP_FRAMES_MAX]
+QUALITY_UP_FRAMES_MAX = 1440
+
+# THREAT RADAR
+RADAR_SECTORS = 16 # Directions off-screen enemies are grouped into
+RADAR_RADIUS = 100 # Distance of the arrows from the screen center
+RADAR_COUNT_SIZES = [(1, 24), (3, 30), (10, 38), (30, 46)] # (enemies in the sector, arrow size) [the largest matching row is used]
+RADAR_THREAT_COLORS = [(800, '#ff3030'), (1600, '#d02424'), (float('inf'), '#901818')] # (closest enemy within, arrow color)
+RADAR_BOSS_SIZE = 50
+RADAR_BOSS_COLOR = 'purple'
+
+# REPLAY
+RNG_SEED = 0 # Default seed of the per-subsystem random streams [live games pick a new seed each time]
+REPLAY_HASH_INTERVAL = 60 # Simulation steps between state hashes stored in a recording
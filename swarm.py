@@ -0,0 +1,69 @@
+import numpy as np
+from settings import *
+
+def neighbor_pairs(points, radius): # Index pairs (i, j) of points in the same or adjacent grid cells [every candidate within radius is included]
+    n = len(points)
+    cells = np.floor(points / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1 # Shifting so every neighbor cell index is positive
+    width = cells[:, 1].max() + 2 # Row length of the flattened grid
+    keys = cells[:, 0] * width + cells[:, 1] # One integer per cell
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    firsts, seconds = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            target = keys + dx * width + dy # Neighbor cell of every point
+            start = np.searchsorted(sorted_keys, target, 'left')
+            counts = np.searchsorted(sorted_keys, target, 'right') - start # Points in that cell
+            total = int(counts.sum())
+            if not total:
+                continue
+            first = np.repeat(np.arange(n), counts)
+            within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) # Position inside the neighbor cell's run
+            firsts.append(first)
+            seconds.append(order[np.repeat(start, counts) + within])
+    if not firsts:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    i, j = np.concatenate(firsts), np.concatenate(seconds)
+    keep = i != j
+    return i[keep], j[keep]
+
+class SwarmController: # Steering every regular enemy at once: seek towards the target plus separation from close neighbors
+    def __init__(self, radius=SEPARATION_RADIUS, weight=SEPARATION_WEIGHT):
+        self.radius = radius # Neighbors closer than this push each other apart
+        self.weight = weight # Strength of the push from one neighbor
+
+    def update(self, enemies, target, flow_field=None, separate=True): # Setting enemy.steer to a unit direction for every living non-boss enemy [separate=False reuses each enemy's last push]
+        swarm = [enemy for enemy in enemies if enemy.enemy_name != 'boss' and not enemy.is_dead]
+        if not swarm:
+            return
+        points = np.array([enemy.rect.center for enemy in swarm], dtype=np.float64)
+
+        # Seek [towards the next cell of the flow field's path when there is one, otherwise straight at the target]
+        goals = flow_field.waypoints(points, target) if flow_field else np.asarray(target, dtype=np.float64)
+        seek = goals - points
+        length = np.hypot(seek[:, 0], seek[:, 1])
+        direction = np.divide(seek, length[:, None], out=np.zeros_like(seek), where=length[:, None] > 0) # Zero on top of the target
+
+        # Separation [the neighbor search is the expensive part, lower quality tiers run it every few steps]
+        if separate:
+            push = np.zeros_like(points)
+            i, j = neighbor_pairs(points, self.radius)
+            if len(i):
+                away = points[i] - points[j]
+                dist = np.hypot(away[:, 0], away[:, 1])
+                close = (dist > 0) & (dist < self.radius)
+                i, away, dist = i[close], away[close], dist[close]
+                pair_push = away / dist[:, None] * self.weight
+                push[:, 0] = np.bincount(i, pair_push[:, 0], minlength=len(swarm))
+                push[:, 1] = np.bincount(i, pair_push[:, 1], minlength=len(swarm))
+        else:
+            push = np.array([enemy.push for enemy in swarm], dtype=np.float64)
+        direction += push
+
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        direction = np.divide(direction, length[:, None], out=np.zeros_like(direction), where=length[:, None] > 0)
+        for enemy, steer, enemy_push in zip(swarm, direction.tolist(), push.tolist()):
+            enemy.steer = steer
+            enemy.push = enemy_push
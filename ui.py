@@ -0,0 +1,54 @@
+import pygame
+from settings import *
+
+class TextCache: # Keeping rendered text surfaces until their text changes
+    def __init__(self):
+        self.entries = {} # Dictionary mapping a slot name to (font, text, color, surface)
+
+    def render(self, key, font, text, color): # Returning the cached surface, rendering only if the slot's text or colour changed
+        entry = self.entries.get(key)
+        if entry and entry[0] is font and entry[1] == text and entry[2] == color:
+            return entry[3]
+        surf = font.render(text, True, color)
+        self.entries[key] = (font, text, color, surf)
+        return surf
+
+class OverlayCache: # Full-screen semi-transparent overlay, rebuilt only when the window size changes
+    def __init__(self, color=UI_BG_COLOR):
+        self.color = color
+        self.surf = None
+
+    def get(self, size):
+        if self.surf is None or self.surf.get_size() != size:
+            self.surf = pygame.Surface(size, pygame.SRCALPHA) # Creating a semi-transparent overlay
+            self.surf.fill(self.color)
+        return self.surf
+
+class PulseCache: # Scaled copies of a surface for a pulsing animation [replaces rotozoom every frame]
+    def __init__(self, surf, low, high, steps=20):
+        self.images = [pygame.transform.rotozoom(surf, 0, low + (high - low) * i / steps) for i in range(steps + 1)] # images[i] is scaled between low and high
+        self.low = low
+        self.high = high
+        self.steps = steps
+
+    def index(self, scale): # Index of the image closest to the given scale
+        i = round((scale - self.low) / (self.high - self.low) * self.steps)
+        return min(max(i, 0), self.steps)
+
+    def scaled(self, scale): # Image closest to the given scale
+        return self.images[self.index(scale)]
+
+class HealthBarCache: # Pre-rendered health bars, one surface per (width, fill level) [replaces two draw.rect calls per enemy]
+    def __init__(self, height=4):
+        self.height = height
+        self.bars = {} # Dictionary mapping (width, health, max_health) to a bar surface
+
+    def get(self, width, health, max_health):
+        key = (width, health, max_health)
+        bar = self.bars.get(key)
+        if bar is None:
+            bar = pygame.Surface((width, self.height)).convert() # Opaque [faster to blit]
+            bar.fill('black') # Background
+            bar.fill('red', (0, 0, int(width * max(health, 0) / max_health), self.height)) # Remaining health
+            self.bars[key] = bar
+        return bar